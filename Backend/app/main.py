@@ -1,24 +1,35 @@
 # main.py
-from fastapi import FastAPI, UploadFile, File, Body, HTTPException, Query
+from fastapi import FastAPI, UploadFile, File, Form, Body, HTTPException, Query
 from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 import os
 import shutil
-import sqlite3
-import re
+import time
+import codecs
+import csv
 import asyncio
 import json
 import httpx
 
-from typing import List, Dict, Any
-from cachetools import TTLCache
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional
 
 # Local utils
-from app.utils.loader import load_and_split
+from app.utils.loader import iter_load_and_split, iter_split_parallel
 from app.utils.db_manager import ChromaDBManager
 from app.utils.kb_manager import KnowledgeBaseManager
+from app.utils.embeddings import EmbeddingService, EmbeddingBatcher
+from app.utils.chunk_cache import ChunkEmbeddingCache
+from app.utils.semantic_cache import SemanticCache
+from app.utils.executor import BlockingExecutor
+from app.utils.job_manager import JobManager
+from app.utils.manifest import IndexManifest
+from app.utils.context_builder import ContextBuilder, load_token_counter
+from app.utils.qa_import import iter_qa_markdown, iter_qa_jsonl, iter_qa_csv
+from app.utils.tenants import Tenant, TenantRegistry
+from app.utils.llm_stream import format_sse, stream_chat
 
 
 # ======================================================
@@ -27,8 +38,6 @@ from app.utils.kb_manager import KnowledgeBaseManager
 load_dotenv()
 app = FastAPI()
 
-cache = TTLCache(maxsize=100, ttl=3600)
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -40,27 +49,166 @@ app.add_middleware(
 os.makedirs("./data/raw_docs", exist_ok=True)
 os.makedirs("./data/chroma_db", exist_ok=True)
 
-document_db = ChromaDBManager("./data/chroma_db")
-knowledge_db = KnowledgeBaseManager("./data/knowledge_base.db")
+# One embedding model shared by the vector store, the KB and the answer cache
+embedder = EmbeddingService(
+    "all-MiniLM-L6-v2",
+    chunk_cache=ChunkEmbeddingCache(
+        "./data/chunk_embeddings.db",
+        max_entries=int(os.getenv("CHUNK_CACHE_MAX_ENTRIES", "500000")),
+    ),
+)
+# Micro-batches concurrent query embeddings in a worker thread
+embed_batcher = EmbeddingBatcher(
+    embedder,
+    max_batch=int(os.getenv("EMBED_MAX_BATCH", "32")),
+    max_wait_ms=float(os.getenv("EMBED_MAX_WAIT_MS", "5")),
+)
 
+# Vector index backend: "chroma" (default), "numpy" (exact) or "hnsw" (approximate)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+BOTS_DIR = "./data/bots"
+
+
+def open_tenant(chatbot_id: Optional[str]) -> Tenant:
+    """
+    Open one chatbot's stores. The default tenant (no id) uses ./data as before;
+    chatbot <id> gets the same layout under ./data/bots/<id>/.
+    """
+    root = "./data" if chatbot_id is None else os.path.join(BOTS_DIR, chatbot_id)
+    raw_dir = os.path.join(root, "raw_docs")
+    os.makedirs(raw_dir, exist_ok=True)
+    return Tenant(
+        chatbot_id,
+        raw_dir,
+        document_db=ChromaDBManager(
+            os.path.join(root, "chroma_db" if VECTOR_BACKEND == "chroma" else f"vector_index_{VECTOR_BACKEND}"),
+            embedder=embedder,
+            batch_size=int(os.getenv("INGEST_BATCH_SIZE", "64")),
+            backend=VECTOR_BACKEND,
+            hybrid=os.getenv("HYBRID_SEARCH", "1") == "1",
+        ),
+        knowledge_db=KnowledgeBaseManager(
+            os.path.join(root, "knowledge_base.db"),
+            embedder=embedder,
+            pool_size=int(os.getenv("KB_DB_POOL_SIZE", "8")),
+            ann=os.getenv("KB_ANN", "0") == "1",
+            ann_path=os.path.join(root, "kb_hnsw.bin"),
+            ann_min_size=int(os.getenv("KB_ANN_MIN_SIZE", "10000")),
+        ),
+        # path -> content hash -> chunk ids of everything in the vector DB
+        manifest=IndexManifest(os.path.join(root, "index_manifest.db")),
+        # Semantic answer cache keyed by the MiniLM embedding of the question
+        cache=SemanticCache(
+            dim=embedder.dim,
+            threshold=float(os.getenv("CACHE_SIM_THRESHOLD", "0.92")),
+            maxsize=int(os.getenv("CACHE_MAXSIZE", "1000")),
+            ttl=float(os.getenv("CACHE_TTL", "3600")),
+            max_bytes=int(os.getenv("CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+        ),
+    )
 
-@app.get("/")
-async def root():
-    return {"status": "API is running"}
 
+# Per-chatbot partitions, opened on first use; idle ones are closed LRU-first
+tenants = TenantRegistry(open_tenant, bots_dir=BOTS_DIR, max_loaded=int(os.getenv("MAX_LOADED_BOTS", "16")))
+# Optional cross-encoder rerank of the retrieved candidates
+reranker = None
+if os.getenv("RERANK", "0") == "1":
+    from app.utils.reranker import CrossEncoderReranker
+    reranker = CrossEncoderReranker(
+        os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+        batch_size=int(os.getenv("RERANK_BATCH_SIZE", "16")),
+        budget_ms=float(os.getenv("RERANK_BUDGET_MS", "150")),
+    )
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "30"))
 
-# ======================================================
-# CLEAN & SSE HELPERS
-# ======================================================
-def clean_llm_output(text: str) -> str:
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\s+([,.;!?'\"])", r"\1", text)
-    text = re.sub(r"(\w)\s+'\s*(\w)", r"\1'\2", text)
-    return "\n".join([line.strip() for line in text.splitlines()]).strip()
+# Dedupes retrieved chunks and packs the most relevant sentences into a token budget
+context_builder = ContextBuilder(
+    embedder,
+    load_token_counter(os.getenv("CONTEXT_TOKENIZER", "Qwen/Qwen2.5-7B-Instruct")),
+    max_tokens=int(os.getenv("CONTEXT_MAX_TOKENS", "600")),
+)
 
+# Bounded worker pools for blocking work, one per operation class
+executor = BlockingExecutor({
+    "query": int(os.getenv("QUERY_WORKERS", "8")),
+    "kb": int(os.getenv("KB_WORKERS", "4")),
+    "ingest": int(os.getenv("INGEST_WORKERS", "2")),
+    # opening/closing chatbot partitions (cold bots load their KB and indexes)
+    "tenants": int(os.getenv("TENANT_WORKERS", "2")),
+})
+
+
+@asynccontextmanager
+async def use_bot(chatbot_id):
+    """
+    Borrow a chatbot's tenant for one request.
+
+    Open bots are taken inline; only opening a bot (and closing the ones it
+    evicts) runs on the "tenants" pool, so cold opens never tie up "kb" workers.
+    """
+    try:
+        tenant = tenants.try_acquire(chatbot_id) or await executor.run("tenants", tenants.acquire, chatbot_id)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    try:
+        yield tenant
+    finally:
+        victims = tenants.release(tenant, close_victims=False)
+        if victims:
+            await executor.run("tenants", tenants.close_evicted, victims)
+
+# Shared upstream HTTP client (created on startup, closed on shutdown)
+http_client: httpx.AsyncClient = None
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """
+    One pooled client for all LLM calls so keep-alive connections (and TLS
+    sessions) to the router are reused across requests.
+    """
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60")),
+    )
+    timeout = httpx.Timeout(
+        connect=float(os.getenv("LLM_CONNECT_TIMEOUT", "10")),
+        read=float(os.getenv("LLM_READ_TIMEOUT", "120")),
+        write=30.0,
+        pool=10.0,
+    )
+    http2 = os.getenv("LLM_HTTP2", "1") == "1"
+    if http2:
+        try:
+            import h2  # noqa: F401  (httpx needs it for HTTP/2)
+        except ImportError:
+            print("h2 not installed, falling back to HTTP/1.1")
+            http2 = False
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
 
-def format_sse(data: str, event: str):
-    return f"event: {event}\ndata: {json.dumps({'text': data})}\n\n"
+
+@app.on_event("startup")
+async def startup():
+    global http_client
+    http_client = build_http_client()
+    embed_batcher.start()
+    jobs.resume()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await embed_batcher.stop()
+    if http_client is not None:
+        await http_client.aclose()
+    executor.shutdown()
+    # Wait for ingest workers to stop before their tenants are closed
+    jobs.shutdown()
+    tenants.close_all()
+
+
+@app.get("/")
+async def root():
+    return {"status": "API is running"}
 
 
 # ======================================================
@@ -73,30 +221,48 @@ async def query(payload: Dict[str, Any] = Body(...)):
     if not question:
         raise HTTPException(400, "Missing question")
 
-    # --------------------------------------------
-    # 1) CACHE CHECK
-    # --------------------------------------------
-    if question in cache:
-        cached = cache[question]
-        async def send_cached():
-            yield format_sse(cached, "final_response")
-        return StreamingResponse(send_cached(), media_type="text/event-stream")
-
-    # --------------------------------------------
-    # 2) KNOWLEDGE BASE CHECK
-    # --------------------------------------------
-    kb_ans, score = knowledge_db.get_best_answer(question)
-    if kb_ans and score >= 0.95:
-        cache[question] = kb_ans
-        async def send_kb():
-            yield format_sse(kb_ans, "final_response")
-        return StreamingResponse(send_kb(), media_type="text/event-stream")
-
-    # --------------------------------------------
-    # 3) RAG CONTEXT BUILDING
-    # --------------------------------------------
-    docs = document_db.similarity_search(question, top_k=4)
-    context = "\n\n".join(d.page_content for d in docs)
+    # Each chatbot only searches its own KB, index and answer cache
+    async with use_bot(payload.get("chatbot_id")) as bot:
+        # --------------------------------------------
+        # 0) EXACT KB MATCH (in-memory, no embedding)
+        # --------------------------------------------
+        exact = bot.knowledge_db.get_exact_answer(question)
+        if exact is not None:
+            async def send_exact():
+                yield format_sse(exact, "final_response")
+            return StreamingResponse(send_exact(), media_type="text/event-stream")
+
+        # --------------------------------------------
+        # 1) CACHE CHECK
+        # --------------------------------------------
+        # Embedded once; the KB lookup and vector search reuse the memoized vector
+        q_vec = await embed_batcher.embed(question)
+        cached = bot.cache.get(question, q_vec)
+        if cached is not None:
+            async def send_cached():
+                yield format_sse(cached, "final_response")
+            return StreamingResponse(send_cached(), media_type="text/event-stream")
+
+        # --------------------------------------------
+        # 2) KNOWLEDGE BASE CHECK
+        # --------------------------------------------
+        kb_ans, score = await executor.run("query", bot.knowledge_db.get_best_answer, question)
+        if kb_ans and score >= 0.95:
+            bot.cache.put(question, q_vec, kb_ans)
+            async def send_kb():
+                yield format_sse(kb_ans, "final_response")
+            return StreamingResponse(send_kb(), media_type="text/event-stream")
+
+        # --------------------------------------------
+        # 3) RAG CONTEXT BUILDING
+        # --------------------------------------------
+        if reranker is None:
+            docs = await executor.run("query", bot.document_db.similarity_search, question, top_k=4)
+        else:
+            candidates = await executor.run("query", bot.document_db.similarity_search, question,
+                                            top_k=RERANK_CANDIDATES)
+            docs = await executor.run("query", reranker.rerank, question, candidates, 4)
+        context = await executor.run("query", context_builder.build, question, docs)
 
     system_message = {
     "role": "system",
@@ -149,7 +315,7 @@ async def query(payload: Dict[str, Any] = Body(...)):
     headers = {
         "Authorization": f"Bearer {HF_API_KEY}",
         "Content-Type": "application/json",
-        "Accept": "application/json"
+        "Accept": "text/event-stream"
     }
 
     body = {
@@ -160,115 +326,243 @@ async def query(payload: Dict[str, Any] = Body(...)):
         ],
         "temperature": 0.7,
         "max_tokens": 300,
-        "stream": False
+        "stream": True
     }
 
     # ======================================================
     # STREAM BACK TO FRONTEND
     # ======================================================
-    async def stream_qwen():
-        try:
-            async with httpx.AsyncClient(timeout=120) as client:
-                response = await client.post(HF_URL, headers=headers, json=body)
+    def remember(answer: str) -> None:
+        bot.cache.put(question, q_vec, answer)
 
-            print("HF STATUS:", response.status_code)
-            print("HF RAW:", response.text[:400])
+    return StreamingResponse(
+        stream_chat(http_client, HF_URL, headers, body, on_answer=remember),
+        media_type="text/event-stream",
+    )
 
-            if response.status_code != 200:
-                yield format_sse(f"HF Error {response.status_code}: {response.text}", "final_response")
-                return
 
-            data = response.json()
+# ======================================================
+# ALL OTHER ENDPOINTS (IDENTICAL TO YOUR ORIGINAL FILE)
+# ======================================================
+def ingest_file(path: str, progress) -> None:
+    """Index one saved file into the chatbot that owns its directory (runs on a job worker)."""
+    with tenants.use(tenants.id_for_path(path)) as bot:
+        index_file(bot, path, progress)
+
+
+def index_file(bot: Tenant, path: str, progress) -> None:
+    """Parse, split and index one saved file, reporting progress."""
+    if path.lower().endswith(".md"):
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        # Skip pairs already in the KB, so a resumed job does not insert them twice
+        progress(qa_indexed=bot.knowledge_db.add_qa_pairs(iter_qa_markdown(text), skip_existing=True))
+
+    # Chunks stream from the loader (page by page for PDFs) into the batched writer
+    pages = set()
+    parsed = 0
+
+    def stream_chunks():
+        nonlocal parsed
+        for d in iter_load_and_split(path):
+            pages.add(d.metadata.get("page", 0))
+            parsed += 1
+            yield d
+
+    def on_progress(embedded, written):
+        progress(pages_parsed=len(pages), chunks_total=parsed,
+                 chunks_embedded=embedded, chunks_written=written)
+
+    # A resumed job may have written part of this file already
+    bot.document_db.delete_documents_by_source(path)
+    ids = bot.document_db.add_documents(stream_chunks(), on_progress=on_progress)
+    progress(pages_parsed=len(pages), chunks_total=parsed)
+    bot.manifest.record(path, ids)
+    # Cached answers were built without this file's content
+    bot.cache.clear()
+
+
+def save_uploads(files: List[UploadFile], raw_dir: str) -> List[str]:
+    paths = []
+    for file in files:
+        dst = os.path.join(raw_dir, file.filename)
+        with open(dst, "wb") as f:
+            shutil.copyfileobj(file.file, f)
+        paths.append(dst)
+    return paths
 
-            # Extract answer
-            answer = (
-                data.get("choices", [{}])[0]
-                    .get("message", {})
-                    .get("content", "")
-            )
 
-            if not answer:
-                yield format_sse(f"Unexpected HF response: {data}", "final_response")
-                return
+jobs = JobManager("./data/jobs.db", ingest_file, max_workers=int(os.getenv("JOB_WORKERS", "2")))
 
-            answer = clean_llm_output(answer)
 
-            # Stream character by character
-            for char in answer:
-                yield format_sse(char, "token")
-                await asyncio.sleep(0.002)
+@app.post("/upload")
+async def upload(files: List[UploadFile] = File(...), chatbot_id: Optional[str] = Form(None)):
+    # Files land in the chatbot's raw_docs, which tells the job where to index them
+    async with use_bot(chatbot_id) as bot:
+        paths = await executor.run("ingest", save_uploads, files, bot.raw_dir)
+    job_id = jobs.submit(paths)
+    return {"message": f"Uploaded {len(files)}, indexing in background (job {job_id})", "job_id": job_id}
+
+
+@app.get("/jobs")
+async def list_jobs(limit: int = Query(50)):
+    return await executor.run("kb", jobs.list_jobs, limit)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, stream: bool = Query(False)):
+    job = await executor.run("kb", jobs.get, job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    if not stream:
+        return job
+
+    async def send_progress():
+        last = None
+        while True:
+            current = await executor.run("kb", jobs.get, job_id)
+            snapshot = json.dumps(current, sort_keys=True)
+            if snapshot != last:
+                last = snapshot
+                yield f"event: progress\ndata: {snapshot}\n\n"
+            if current["status"] in JobManager.FINISHED:
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(send_progress(), media_type="text/event-stream")
 
-            cache[question] = answer
-            # Send final_response with complete answer only once at the end
-            yield format_sse(answer, "final_response")
 
-        except Exception as e:
-            yield format_sse(f"Error: {str(e)}", "final_response")
+def collect_stats(bot: Tenant) -> Dict[str, Any]:
+    vect = bot.document_db.get_stats()
+    kb_cnt = bot.knowledge_db.count()
 
-    return StreamingResponse(stream_qwen(), media_type="text/event-stream")
+    raw_files = sorted(os.listdir(bot.raw_dir))
+    return {"vector_db": vect, "qa_pairs": kb_cnt, "raw_count": len(raw_files), "raw_files": raw_files}
 
 
-# ======================================================
-# ALL OTHER ENDPOINTS (IDENTICAL TO YOUR ORIGINAL FILE)
-# ======================================================
-@app.post("/upload")
-async def upload(files: List[UploadFile] = File(...)):
-    chunks = []
-    qa_count = 0
-    raw_dir = "./data/raw_docs"
+@app.get("/db_stats")
+async def stats(chatbot_id: Optional[str] = Query(None)):
+    async with use_bot(chatbot_id) as bot:
+        return await executor.run("kb", collect_stats, bot)
 
-    for file in files:
-        dst = os.path.join(raw_dir, file.filename)
-        with open(dst, "wb") as f:
-            shutil.copyfileobj(file.file, f)
 
-        if dst.lower().endswith(".md"):
-            with open(dst, encoding="utf-8") as f:
-                text = f.read()
-            for q, a in re.findall(r"Q:\s*(.*?)\nA:\s*(.*?)(?:\n{1,}|$)", text, re.DOTALL):
-                knowledge_db.add_qa_pair(q.strip(), a.strip(), "")
-                qa_count += 1
+@app.get("/cache_stats")
+async def cache_stats(chatbot_id: Optional[str] = Query(None)):
+    async with use_bot(chatbot_id) as bot:
+        return bot.cache.get_stats()
 
-        chunks.extend(load_and_split(dst))
 
-    if chunks:
-        document_db.add_documents(chunks)
+@app.get("/bot_stats")
+async def bot_stats():
+    return tenants.get_stats()
 
-    return {"message": f"Uploaded {len(files)}, indexed {len(chunks)} chunks", "qa_indexed": qa_count}
 
+@app.get("/embedding_stats")
+async def embedding_stats():
+    return {
+        "query_batching": embed_batcher.get_stats(),
+        "chunk_cache": await executor.run("kb", embedder.chunk_cache.get_stats),
+    }
 
-@app.get("/db_stats")
-async def stats():
-    vect = document_db.get_stats()
-    with sqlite3.connect("./data/knowledge_base.db") as conn:
-        kb_cnt = conn.execute("SELECT COUNT(*) FROM qa_pairs").fetchone()[0]
 
-    raw_files = sorted(os.listdir("./data/raw_docs"))
-    return {"vector_db": vect, "qa_pairs": kb_cnt, "raw_count": len(raw_files), "raw_files": raw_files}
+@app.get("/rerank_stats")
+async def rerank_stats():
+    if reranker is None:
+        return {"enabled": False}
+    return {"enabled": True, **reranker.get_stats()}
+
+
+@app.get("/executor_stats")
+async def executor_stats():
+    return executor.get_stats()
+
+
+def sync_raw_docs(bot: Tenant, full: bool = False) -> Dict[str, Any]:
+    """
+    Bring a chatbot's vector DB in line with its raw_docs directory.
+
+    Only added or changed files (by content hash) are parsed and embedded,
+    chunks of removed files are deleted, and unchanged files are left alone.
+    With `full=True` the DB and manifest are wiped first, so everything is rebuilt.
+    """
+    document_db, manifest = bot.document_db, bot.manifest
+    if full:
+        document_db.clear_database()
+        manifest.clear()
+
+    indexed = manifest.get_all()
+    paths = [os.path.join(bot.raw_dir, fname) for fname in os.listdir(bot.raw_dir)]
+
+    present = set(paths)
+    removed = [p for p in indexed if p not in present]
+    for p in removed:
+        document_db.delete_ids(indexed[p]["chunk_ids"])
+        manifest.remove(p)
+
+    stale = [p for p in paths if not manifest.is_current(p, indexed.get(p))]
+    for p in stale:
+        # Also catches chunks left behind by an interrupted earlier sync
+        document_db.delete_documents_by_source(p)
+
+    # Files (and page ranges of large PDFs) are parsed in a process pool and
+    # streamed into the batched writer while the rest keep parsing.
+    sources = []
+    failed: Dict[str, str] = {}
+
+    def stream_chunks():
+        workers = int(os.getenv("PARSE_PROCESSES", "0")) or None
+        for path, chunks, error in iter_split_parallel(stale, max_workers=workers):
+            if error is not None:
+                failed[path] = error
+            for d in chunks:
+                sources.append(path)
+                yield d
+
+    ids = document_db.add_documents(stream_chunks())
+    ids_by_path = {p: [] for p in stale}
+    for src, chunk_id in zip(sources, ids):
+        ids_by_path[src].append(chunk_id)
+    for p in stale:
+        # A file with any failed part stays un-recorded, so the next sync retries it
+        if p not in failed:
+            manifest.record(p, ids_by_path[p])
+    total = len(ids)
+    reindexed = len(stale) - len(failed)
+
+    print(f"Synced raw_docs: {reindexed} re-indexed ({total} chunks), {len(failed)} failed, "
+          f"{len(removed)} removed, {len(paths) - len(stale)} unchanged.")
+    return {"reindexed": reindexed, "failed": failed, "removed": len(removed),
+            "unchanged": len(paths) - len(stale), "chunks": total}
 
 
 @app.post("/reset_db")
-async def reset_db():
-    document_db.clear_database()
-    chunks = []
-    for fname in os.listdir("./data/raw_docs"):
-        full_path = "./data/raw_docs/" + fname
-        chunks.extend(load_and_split(full_path))
+async def reset_db(mode: str = Query("full"), chatbot_id: Optional[str] = Query(None)):
+    if mode not in ("full", "sync"):
+        raise HTTPException(400, "mode must be 'full' or 'sync'")
 
-    if chunks:
-        document_db.add_documents(chunks)
+    async with use_bot(chatbot_id) as bot:
+        result = await executor.run("ingest", sync_raw_docs, bot, mode == "full")
+        bot.cache.clear()
+    if mode == "full":
+        return {"message": "Vector DB reset and re-indexed", **result}
+    return {"message": "Vector DB synced with raw_docs", **result}
 
-    return {"message": "Vector DB reset and re-indexed"}
+
+def delete_raw_doc(bot: Tenant, src: str) -> None:
+    bot.document_db.delete_documents_by_source(src)
+    bot.manifest.remove(src)
+    os.remove(src)
 
 
 @app.delete("/raw_docs")
-async def delete_raw(filename: str = Query(...)):
-    src = "./data/raw_docs/" + filename
-    if not os.path.exists(src):
-        raise HTTPException(404, "File not found")
+async def delete_raw(filename: str = Query(...), chatbot_id: Optional[str] = Query(None)):
+    async with use_bot(chatbot_id) as bot:
+        src = os.path.join(bot.raw_dir, filename)
+        if not os.path.exists(src):
+            raise HTTPException(404, "File not found")
 
-    document_db.delete_documents_by_source(src)
-    os.remove(src)
+        await executor.run("ingest", delete_raw_doc, bot, src)
+        bot.cache.clear()
 
     return {"message": f"Deleted {filename}"}
 
@@ -282,16 +576,93 @@ async def add_knowledge(payload: Dict[str, Any] = Body(...)):
     if not q or not a:
         raise HTTPException(400, "Missing question or answer")
 
-    knowledge_db.add_qa_pair(q, a, t)
+    async with use_bot(payload.get("chatbot_id")) as bot:
+        await executor.run("kb", bot.knowledge_db.add_qa_pair, q, a, t)
+        # Cached answers may predate (or contradict) the KB change
+        bot.cache.clear()
     return {"message": "Knowledge added"}
 
 
+def import_qa_file(bot: Tenant, file: UploadFile, fmt: str) -> Dict[str, Any]:
+    """Stream-parse an uploaded JSONL/CSV file into the KB in one bulk insert."""
+    lines = codecs.iterdecode(file.file, "utf-8-sig")
+    parse = iter_qa_csv if fmt == "csv" else iter_qa_jsonl
+    rows = 0
+
+    def counted():
+        nonlocal rows
+        for pair in parse(lines):
+            rows += 1
+            yield pair
+
+    start = time.perf_counter()
+    added = bot.knowledge_db.add_qa_pairs(counted())
+    bot.cache.clear()
+    elapsed = time.perf_counter() - start
+    print(f"Imported {added} QA pairs from {file.filename} in {elapsed:.1f}s")
+    return {
+        "added": added,
+        "skipped": rows - added,
+        "seconds": round(elapsed, 3),
+        "pairs_per_sec": round(added / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+@app.post("/knowledge/import")
+async def import_knowledge(file: UploadFile = File(...), format: str = Query(None),
+                           chatbot_id: Optional[str] = Query(None)):
+    """
+    Bulk-import QA pairs from a JSONL ({"question", "answer", "tags"} per line)
+    or CSV (question,answer[,tags] header) upload. The format defaults to the
+    file extension.
+    """
+    fmt = (format or os.path.splitext(file.filename or "")[1].lstrip(".")).lower()
+    if fmt not in ("jsonl", "csv"):
+        raise HTTPException(400, "Expected a .jsonl or .csv file (or ?format=jsonl|csv)")
+    async with use_bot(chatbot_id) as bot:
+        try:
+            return await executor.run("ingest", import_qa_file, bot, file, fmt)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(400, f"Import failed, nothing was added: {e}")
+
+
 @app.get("/knowledge")
-async def list_kb():
-    return knowledge_db.get_all_qa_pairs()
+async def list_kb(chatbot_id: Optional[str] = Query(None)):
+    async with use_bot(chatbot_id) as bot:
+        return await executor.run("kb", bot.knowledge_db.get_all_qa_pairs)
+
+
+@app.put("/knowledge/{id}")
+async def update_kb(id: int, payload: Dict[str, Any] = Body(...), chatbot_id: Optional[str] = Query(None)):
+    q = payload.get("question")
+    a = payload.get("answer")
+    t = payload.get("tags")
+
+    if not q or not a:
+        raise HTTPException(400, "Missing question or answer")
+
+    async with use_bot(chatbot_id) as bot:
+        if not await executor.run("kb", bot.knowledge_db.update_qa_pair, id, q, a, t):
+            raise HTTPException(404, "Knowledge entry not found")
+        bot.cache.clear()
+    return {"message": "Updated"}
 
 
 @app.delete("/knowledge/{id}")
-async def delete_kb(id: int):
-    knowledge_db.delete_qa_pair(id)
+async def delete_kb(id: int, chatbot_id: Optional[str] = Query(None)):
+    async with use_bot(chatbot_id) as bot:
+        await executor.run("kb", bot.knowledge_db.delete_qa_pair, id)
+        bot.cache.clear()
     return {"message": "Deleted"}
+
+
+@app.post("/knowledge/bulk_delete")
+async def bulk_delete_kb(payload: Dict[str, Any] = Body(...), chatbot_id: Optional[str] = Query(None)):
+    ids = payload.get("ids")
+    if not isinstance(ids, list):
+        raise HTTPException(400, "Missing ids")
+
+    async with use_bot(chatbot_id) as bot:
+        deleted = await executor.run("kb", bot.knowledge_db.delete_qa_pairs, [int(i) for i in ids])
+        bot.cache.clear()
+    return {"message": f"Deleted {deleted}", "deleted": deleted}
@@ -0,0 +1,169 @@
+# app/utils/bm25_index.py
+import os
+import pickle
+import re
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Keeps amounts, codes and dotted names intact: "1,50,000", "cs-301", "b.tech"
+_TOKEN_RE = re.compile(r"\w+(?:[.,/-]\w+)*")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it of on or that the their this "
+    "to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    Incremental in-memory BM25 inverted index over document chunks.
+
+    - Postings are compact int arrays per term; a NumPy copy of each posting
+      list is cached until the term changes, so scoring a query is a handful
+      of vectorized adds into one dense score array.
+    - Deletes tombstone the chunk; postings are compacted once more than half
+      of the slots are dead.
+    - Persisted with pickle next to the vector index.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.RLock()
+        self._ids: List[Optional[str]] = []
+        self._texts: List[Optional[str]] = []
+        self._metas: List[Optional[Dict]] = []
+        self._lens = array("i")
+        self._alive = bytearray()
+        self._row: Dict[str, int] = {}
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._np_cache: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._total_len = 0
+        self._dirty = False
+
+        if self.path and os.path.exists(self.path):
+            with open(self.path, "rb") as fh:
+                state = pickle.load(fh)
+            self._ids, self._texts, self._metas = state["ids"], state["texts"], state["metas"]
+            self._lens, self._postings = state["lens"], state["postings"]
+            self._alive = bytearray(i is not None for i in self._ids)
+            self._row = {i: r for r, i in enumerate(self._ids) if i is not None}
+            self._total_len = sum(self._lens[r] for r in self._row.values())
+
+    def count(self) -> int:
+        return len(self._row)
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict]) -> None:
+        """Index chunks; an id that is already present is replaced."""
+        with self._lock:
+            self.delete_ids([i for i in ids if i in self._row])
+            for chunk_id, text, meta in zip(ids, texts, metadatas):
+                row = len(self._ids)
+                tokens = tokenize(text)
+                tf: Dict[str, int] = {}
+                for t in tokens:
+                    tf[t] = tf.get(t, 0) + 1
+                for t, n in tf.items():
+                    docs, freqs = self._postings.setdefault(t, (array("i"), array("i")))
+                    docs.append(row)
+                    freqs.append(n)
+                    self._np_cache.pop(t, None)
+
+                self._ids.append(chunk_id)
+                self._texts.append(text)
+                self._metas.append(meta)
+                self._lens.append(len(tokens))
+                self._alive.append(1)
+                self._row[chunk_id] = row
+                self._total_len += len(tokens)
+            self._dirty = True
+
+    def delete_ids(self, ids: List[str]) -> None:
+        with self._lock:
+            for chunk_id in ids:
+                row = self._row.pop(chunk_id, None)
+                if row is None:
+                    continue
+                self._total_len -= self._lens[row]
+                self._ids[row] = self._texts[row] = self._metas[row] = None
+                self._alive[row] = 0
+                self._dirty = True
+            if len(self._ids) > 1024 and len(self._row) < len(self._ids) // 2:
+                self._compact()
+
+    def delete_by_source(self, source: str) -> None:
+        with self._lock:
+            self.delete_ids([i for r, i in enumerate(self._ids)
+                             if i is not None and self._metas[r].get("source") == source])
+
+    def _compact(self) -> None:
+        """Rebuild from live chunks only, dropping tombstoned rows from every posting list."""
+        live = [(self._ids[r], self._texts[r], self._metas[r]) for r in sorted(self._row.values())]
+        self._ids, self._texts, self._metas = [], [], []
+        self._lens = array("i")
+        self._alive = bytearray()
+        self._row, self._postings, self._np_cache = {}, {}, {}
+        self._total_len = 0
+        if live:
+            ids, texts, metas = zip(*live)
+            self.add(list(ids), list(texts), list(metas))
+
+    def search(self, query: str, k: int = 20) -> List[Tuple[Document, float]]:
+        """Return up to k (Document, BM25 score) pairs, best first."""
+        with self._lock:
+            n_docs = len(self._row)
+            terms = set(tokenize(query))
+            if not n_docs or not terms:
+                return []
+
+            n_slots = len(self._ids)
+            lens = np.array(self._lens, dtype=np.float32)
+            avg_len = self._total_len / n_docs
+            norm = self.k1 * (1 - self.b + self.b * lens / avg_len)
+            scores = np.zeros(n_slots, dtype=np.float32)
+
+            for t in terms:
+                if t not in self._postings:
+                    continue
+                cached = self._np_cache.get(t)
+                if cached is None:
+                    docs, freqs = self._postings[t]
+                    cached = (np.array(docs, dtype=np.int64), np.array(freqs, dtype=np.float32))
+                    self._np_cache[t] = cached
+                docs, tf = cached
+                df = len(docs)
+                idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm[docs])
+
+            if len(self._row) < n_slots:
+                scores *= np.frombuffer(bytes(self._alive), dtype=np.uint8)
+            hits = np.flatnonzero(scores)
+            if not len(hits):
+                return []
+            k = min(k, len(hits))
+            top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+            top = top[np.argsort(-scores[top])]
+            return [(Document(page_content=self._texts[r], metadata=dict(self._metas[r])), float(scores[r]))
+                    for r in top]
+
+    def persist(self) -> None:
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as fh:
+                pickle.dump({"ids": self._ids, "texts": self._texts, "metas": self._metas,
+                             "lens": self._lens, "postings": self._postings}, fh,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+            self._dirty = False
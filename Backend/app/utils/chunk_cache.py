@@ -0,0 +1,105 @@
+# app/utils/chunk_cache.py
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class ChunkEmbeddingCache:
+    """
+    Persistent content-addressed cache of chunk embeddings.
+
+    - Key: sha256 of (model id, whitespace-normalized chunk text), so identical
+      or re-uploaded text is embedded once per model.
+    - Value: the float32 vector as a BLOB in SQLite.
+    - Bounded to `max_entries`; the least recently used rows are dropped first.
+    """
+
+    def __init__(self, db_path: str = "./data/chunk_embeddings.db", max_entries: int = 500_000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunk_vectors(
+                    key TEXT PRIMARY KEY,
+                    vector BLOB,
+                    last_used REAL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunk_vectors_last_used ON chunk_vectors(last_used)")
+            conn.commit()
+
+    @staticmethod
+    def key(model_id: str, text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{model_id}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model_id: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Return the cached vector for each text, or None where it is not cached."""
+        keys = [self.key(model_id, t) for t in texts]
+        found: Dict[str, bytes] = {}
+        with sqlite3.connect(self.db_path) as conn:
+            # stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                marks = ",".join("?" * len(part))
+                found.update(conn.execute(
+                    f"SELECT key, vector FROM chunk_vectors WHERE key IN ({marks})", part
+                ).fetchall())
+                hit = [k for k in part if k in found]
+                if hit:
+                    conn.execute(
+                        f"UPDATE chunk_vectors SET last_used = ? WHERE key IN ({','.join('?' * len(hit))})",
+                        [time.time(), *hit],
+                    )
+            conn.commit()
+
+        with self._lock:
+            n_hit = sum(k in found for k in keys)
+            self.hits += n_hit
+            self.misses += len(keys) - n_hit
+        return [np.frombuffer(found[k], dtype=np.float32) if k in found else None for k in keys]
+
+    def put_many(self, model_id: str, texts: List[str], vectors: np.ndarray) -> None:
+        """Store vectors for texts and trim the cache back to `max_entries`."""
+        if not texts:
+            return
+        now = time.time()
+        rows = [(self.key(model_id, t), np.asarray(v, dtype=np.float32).tobytes(), now)
+                for t, v in zip(texts, vectors)]
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany("INSERT OR REPLACE INTO chunk_vectors(key, vector, last_used) VALUES(?,?,?)", rows)
+            excess = conn.execute("SELECT COUNT(*) FROM chunk_vectors").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM chunk_vectors WHERE key IN "
+                    "(SELECT key FROM chunk_vectors ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+            conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns hit-rate counters and current size."""
+        with sqlite3.connect(self.db_path) as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM chunk_vectors").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
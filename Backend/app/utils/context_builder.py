@@ -0,0 +1,107 @@
+# app/utils/context_builder.py
+import re
+from typing import Callable, List, Optional, Set
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.utils.embeddings import EmbeddingService
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def _shingles(text: str, n: int = 5) -> Set[str]:
+    words = text.lower().split()
+    return {" ".join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))}
+
+
+def load_token_counter(tokenizer_name: Optional[str]) -> Callable[[str], int]:
+    """
+    Token counter for the upstream model's tokenizer; falls back to a
+    ~4 characters/token estimate if the tokenizer cannot be loaded.
+    """
+    if tokenizer_name:
+        try:
+            from transformers import AutoTokenizer
+
+            tok = AutoTokenizer.from_pretrained(tokenizer_name)
+            return lambda text: len(tok.encode(text, add_special_tokens=False))
+        except Exception as e:
+            print(f"Could not load tokenizer {tokenizer_name}, estimating tokens: {e}")
+    return lambda text: max(1, len(text) // 4)
+
+
+class ContextBuilder:
+    """
+    Turns retrieved chunks into a compact RAG context.
+
+    - Drops near-duplicate chunks (5-word shingle Jaccard >= dup_threshold),
+      e.g. the same page indexed from two files.
+    - Drops sentences already contained in kept text, which removes the
+      splitter's chunk overlap.
+    - Ranks the remaining sentences by similarity to the question (plus a
+      small bonus for the chunk's retrieval rank) and packs the best ones up
+      to `max_tokens`, then restores document order for readability.
+    """
+
+    def __init__(self, embedder: EmbeddingService, count_tokens: Callable[[str], int],
+                 max_tokens: int = 600, dup_threshold: float = 0.8):
+        self.embedder = embedder
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.dup_threshold = dup_threshold
+
+    def _dedupe_chunks(self, docs: List[Document]) -> List[str]:
+        kept, kept_shingles = [], []
+        for d in docs:
+            sh = _shingles(d.page_content)
+            if any(len(sh & other) / len(sh | other) >= self.dup_threshold for other in kept_shingles):
+                continue
+            kept.append(d.page_content)
+            kept_shingles.append(sh)
+        return kept
+
+    def build(self, question: str, docs: List[Document]) -> str:
+        chunks = self._dedupe_chunks(docs)
+
+        # (chunk index, sentence) with overlapping/repeated spans removed
+        sentences = []
+        seen = ""
+        for ci, chunk in enumerate(chunks):
+            for sent in _SENTENCE_RE.split(chunk):
+                sent = sent.strip()
+                norm = " ".join(sent.lower().split())
+                if len(norm) < 3 or norm in seen:
+                    continue
+                sentences.append((ci, sent))
+                seen += norm + "\n"
+        if not sentences:
+            return ""
+
+        texts = [s for _, s in sentences]
+        everything = self._assemble(chunks, sentences, range(len(sentences)))
+        if self.count_tokens(everything) <= self.max_tokens:
+            return everything
+
+        sims = self.embedder.encode(texts) @ self.embedder.embed_question(question)
+        rank_bonus = np.array([0.05 * (len(chunks) - ci) / len(chunks) for ci, _ in sentences])
+        order = np.argsort(-(sims + rank_bonus))
+
+        picked, used = set(), 0
+        for i in order:
+            cost = self.count_tokens(texts[i])
+            if used + cost > self.max_tokens:
+                continue
+            picked.add(int(i))
+            used += cost
+        return self._assemble(chunks, sentences, picked)
+
+    @staticmethod
+    def _assemble(chunks: List[str], sentences: List, picked) -> str:
+        """Join picked sentences back in document order, one paragraph per chunk."""
+        picked = set(picked)
+        parts: List[List[str]] = [[] for _ in chunks]
+        for i, (ci, sent) in enumerate(sentences):
+            if i in picked:
+                parts[ci].append(sent)
+        return "\n\n".join(" ".join(p) for p in parts if p)
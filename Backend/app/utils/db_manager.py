@@ -1,75 +1,189 @@
 # app/utils/db_manager.py
+import hashlib
 import os
 import shutil
-from typing import List, Dict, Any
+import time
+from itertools import islice
+from typing import Callable, Iterable, List, Dict, Any, Optional
 from langchain_core.documents import Document
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+
+from app.utils.bm25_index import BM25Index
+from app.utils.embeddings import EmbeddingService
+from app.utils.vector_backends import VectorBackend, create_backend
 
 class ChromaDBManager:
-    def __init__(self, persist_directory: str = "./data/chroma_db", collection_name: str = "document_chunks"):
+    """
+    Document chunk store used for RAG retrieval.
+
+    Embedding, batching and id assignment live here; storage and search are
+    delegated to a VectorBackend selected by `backend` ("chroma", "numpy", "hnsw").
+    A BM25 index is maintained alongside it; with `hybrid=True` searches fuse
+    the lexical and vector rankings with reciprocal-rank fusion.
+    """
+
+    def __init__(self, persist_directory: str = "./data/chroma_db", collection_name: str = "document_chunks",
+                 embedder: Optional[EmbeddingService] = None, batch_size: int = 64, backend: str = "chroma",
+                 hybrid: bool = True):
         self.persist_directory = persist_directory
         self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.backend_name = backend
+        self.hybrid = hybrid
         os.makedirs(self.persist_directory, exist_ok=True)
         
-        self.embedding_function = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        
-        self.vectordb = Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=self.embedding_function,
-            collection_name=self.collection_name
+        self.embedding_function = embedder or EmbeddingService()
+        self.last_write: Dict[str, Any] = {}
+
+        self.backend: VectorBackend = create_backend(
+            backend, self.persist_directory, self.collection_name, self.embedding_function
         )
 
-    def add_documents(self, docs: List[Document]):
-        """Add a list of Document objects to the vector DB."""
-        if not docs:
-            return
-        print(f"Adding {len(docs)} documents to vector DB...")
-        self.vectordb.add_documents(docs)
-        print("Documents added and persisted.")
+        self.lexical = BM25Index(os.path.join(self.persist_directory, "bm25.pkl"))
+        if self.hybrid and not self.lexical.count() and self.backend.count():
+            # Index built before the lexical index existed: backfill it once
+            print("Building BM25 index from existing vector store...")
+            self.lexical.add(*self.backend.get_all())
+            self.lexical.persist()
+
+    @staticmethod
+    def chunk_key(doc: Document) -> str:
+        """Content key from source, page and text; ids are `<key>-<occurrence>`."""
+        key = f"{doc.metadata.get('source', '')}\0{doc.metadata.get('page', '')}\0{doc.page_content}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+    def add_documents(self, docs: Iterable[Document], batch_size: Optional[int] = None,
+                      on_progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """
+        Stream Documents into the vector DB in fixed-size batches and return their ids.
+
+        Only one batch is held in memory at a time, so `docs` can be a generator.
+        Ids are deterministic and written with upsert, so a retried batch is idempotent.
+        `on_progress(embedded, written)` is called with running totals after each step.
+        """
+        batch_size = batch_size or self.batch_size
+        docs = iter(docs)
+        ids: List[str] = []
+        seen: Dict[str, int] = {}
+        embedded = written = 0
+        start_time = time.perf_counter()
+
+        while True:
+            batch = list(islice(docs, batch_size))
+            if not batch:
+                break
+            texts = [d.page_content for d in batch]
+            vectors = self.embedding_function.embed_chunks(texts)
+            embedded += len(batch)
+            if on_progress:
+                on_progress(embedded, written)
+
+            # Deterministic ids; repeated text within one stream gets an occurrence suffix
+            batch_ids = []
+            for d in batch:
+                key = self.chunk_key(d)
+                n = seen.get(key, 0)
+                seen[key] = n + 1
+                batch_ids.append(f"{key}-{n}")
+            self.backend.add(batch_ids, vectors, texts, [d.metadata for d in batch])
+            self.lexical.add(batch_ids, texts, [d.metadata for d in batch])
+            ids.extend(batch_ids)
+            written += len(batch)
+            if on_progress:
+                on_progress(embedded, written)
+
+        self.backend.persist()
+        self.lexical.persist()
+        if written:
+            elapsed = time.perf_counter() - start_time
+            self.last_write = {
+                "chunks": written,
+                "seconds": round(elapsed, 3),
+                "chunks_per_sec": round(written / elapsed, 1) if elapsed else 0.0,
+                "batch_size": batch_size,
+            }
+            print(f"Wrote {written} chunks in {elapsed:.2f}s ({self.last_write['chunks_per_sec']} chunks/s).")
+        return ids
 
     def similarity_search(self, query: str, top_k: int = 4) -> List[Document]:
         """Return top-k similar documents for a given query."""
-        return self.vectordb.similarity_search(query, k=top_k)
+        return [doc for doc, _ in self.similarity_search_with_scores(query, top_k)]
+
+    def similarity_search_with_scores(self, query: str, top_k: int = 4, candidates: int = 20):
+        """
+        Return top-k (Document, score) pairs for a given query.
+        Scores are cosine similarities, or RRF scores when hybrid search is on.
+        """
+        dense = self.backend.search(self.embedding_function.embed_question(query), max(top_k, candidates))
+        if not self.hybrid:
+            return dense[:top_k]
+        return self.fuse([dense, self.lexical.search(query, candidates)], top_k)
+
+    @classmethod
+    def fuse(cls, rankings: List[List], top_k: int, k: int = 60):
+        """Reciprocal-rank fusion: score(d) = sum over rankings of 1 / (k + rank)."""
+        scores: Dict[str, float] = {}
+        docs: Dict[str, Document] = {}
+        for ranking in rankings:
+            for rank, (doc, _) in enumerate(ranking):
+                key = cls.chunk_key(doc)
+                scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+                docs.setdefault(key, doc)
+        best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return [(docs[key], scores[key]) for key in best]
+
+    def delete_ids(self, ids: List[str]):
+        """Deletes vector chunks by id."""
+        if ids:
+            self.backend.delete_ids(ids)
+            self.lexical.delete_ids(ids)
+            self.backend.persist()
+            self.lexical.persist()
 
     def delete_documents_by_source(self, source_path: str):
         """Deletes all vector chunks associated with a specific source file path."""
-        if not self.vectordb._collection.count():
-             return
-
-        docs_with_metadata = self.vectordb.get(where={"source": source_path})
-        
-        ids_to_delete = docs_with_metadata.get("ids")
-        if ids_to_delete:
-            print(f"Deleting {len(ids_to_delete)} chunks for source: {source_path}")
-            self.vectordb.delete(ids=ids_to_delete)
-            print("Deletion complete.")
+        deleted = self.backend.delete_by_source(source_path)
+        self.lexical.delete_by_source(source_path)
+        self.lexical.persist()
+        if deleted:
+            self.backend.persist()
+            print(f"Deleted {deleted} chunks for source: {source_path}")
         else:
             print(f"No chunks found for source: {source_path}")
 
 
     def clear_database(self):
         """
-        Clears the persisted database directory and re-initializes an empty Chroma instance.
+        Clears the persisted database directory and re-initializes an empty backend.
         """
         print(f"Clearing all documents and deleting directory for collection '{self.collection_name}'...")
         if os.path.exists(self.persist_directory):
             shutil.rmtree(self.persist_directory)
         os.makedirs(self.persist_directory, exist_ok=True)
         
-        self.__init__(self.persist_directory, self.collection_name)
+        self.__init__(self.persist_directory, self.collection_name, self.embedding_function, self.batch_size,
+                      self.backend_name, self.hybrid)
         print("Database cleared and re-initialized.")
 
+    def close(self) -> None:
+        """Persist the vector backend and BM25 index and release the backend's client."""
+        self.backend.close()
+        self.lexical.persist()
+
     def get_stats(self) -> Dict[str, Any]:
         """Returns stats about the vector store."""
         try:
-            count = self.vectordb._collection.count()
+            count = self.backend.count()
             return {
                 "collections": 1,
+                "backend": self.backend_name,
+                "hybrid": self.hybrid,
+                "lexical_chunks": self.lexical.count(),
                 "total_documents": count,
                 "indexed_chunks": count,
-                "model": self.embedding_function.model_name
+                "model": self.embedding_function.model_name,
+                "last_write": self.last_write
             }
         except Exception as e:
             print(f"Could not get stats, possibly empty DB: {e}")
-            return {"collections": 1, "total_documents": 0, "indexed_chunks": 0, "model": self.embedding_function.model_name}
\ No newline at end of file
+            return {"collections": 1, "backend": self.backend_name, "total_documents": 0, "indexed_chunks": 0,
+                    "model": self.embedding_function.model_name}
@@ -0,0 +1,218 @@
+# app/utils/embeddings.py
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from sentence_transformers import SentenceTransformer
+
+from app.utils.chunk_cache import ChunkEmbeddingCache
+
+
+class EmbeddingService(Embeddings):
+    """
+    Owns the single SentenceTransformer instance shared by the vector store,
+    the knowledge base and the answer cache.
+
+    - Implements LangChain's `Embeddings` interface so it can be handed to Chroma.
+    - Returns L2-normalized float32 vectors.
+    - Memoizes recent query embeddings, so the question of one /query is
+      encoded once and reused by the cache, KB lookup and vector search.
+    - Optionally looks document chunks up in a persistent ChunkEmbeddingCache
+      so identical text is never embedded twice during ingestion.
+    - `model_id` is the model name plus a hash of its weights; persisted
+      vectors are keyed by it, so new weights under the same name are re-embedded.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", memo_size: int = 1024,
+                 chunk_cache: Optional[ChunkEmbeddingCache] = None):
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.model_version = self.weights_hash(self.model)
+        self.model_id = f"{model_name}@{self.model_version}"
+        self.chunk_cache = chunk_cache
+
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def weights_hash(model) -> str:
+        """Short sha1 over the model's parameter names and raw weight bytes."""
+        import torch
+
+        h = hashlib.sha1()
+        for name, tensor in model.state_dict().items():
+            h.update(name.encode("utf-8"))
+            h.update(tensor.detach().cpu().contiguous().view(-1).view(torch.uint8).numpy().tobytes())
+        return h.hexdigest()[:16]
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode a batch of texts into an (n, dim) normalized float32 matrix."""
+        return self.model.encode(
+            texts, convert_to_numpy=True, normalize_embeddings=True
+        ).astype(np.float32, copy=False)
+
+    def lookup(self, text: str) -> Optional[np.ndarray]:
+        """Return the memoized vector for a query text, if any."""
+        with self._lock:
+            vec = self._memo.get(text)
+            if vec is not None:
+                self._memo.move_to_end(text)
+            return vec
+
+    def remember(self, text: str, vec: np.ndarray) -> None:
+        """Memoize a query vector computed elsewhere (e.g. by the batcher)."""
+        vec.setflags(write=False)
+        with self._lock:
+            self._memo[text] = vec
+            self._memo.move_to_end(text)
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def embed_question(self, text: str) -> np.ndarray:
+        """Encode one query text, reusing the vector if it was embedded recently."""
+        vec = self.lookup(text)
+        if vec is None:
+            vec = self.encode([text])[0]
+            self.remember(text, vec)
+        return vec
+
+    def embed_chunks(self, texts: List[str]) -> np.ndarray:
+        """Encode document chunks, serving repeated text from the chunk cache."""
+        if self.chunk_cache is None:
+            return self.encode(texts)
+
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        missing = []
+        for i, vec in enumerate(self.chunk_cache.get_many(self.model_id, texts)):
+            if vec is None:
+                missing.append(i)
+            else:
+                out[i] = vec
+        if missing:
+            fresh = self.encode([texts[i] for i in missing])
+            out[missing] = fresh
+            self.chunk_cache.put_many(self.model_id, [texts[i] for i in missing], fresh)
+        return out
+
+    # LangChain Embeddings interface
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.embed_chunks(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_question(text).tolist()
+
+
+class EmbeddingBatcher:
+    """
+    Async micro-batching front end for EmbeddingService.
+
+    Concurrent callers enqueue their text and await a future. A single worker
+    collects requests for up to `max_wait_ms` or `max_batch` items, encodes
+    them as one batch in a worker thread and resolves every future, so the
+    event loop never runs model inference itself.
+    """
+
+    def __init__(self, service: EmbeddingService, max_batch: int = 32, max_wait_ms: float = 5.0):
+        self.service = service
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.items = 0
+        self.full_batches = 0
+        self.encode_seconds = 0.0
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Return the normalized embedding of `text`, batched with concurrent callers."""
+        vec = self.service.lookup(text)
+        if vec is not None:
+            return vec
+        if self._worker is None:
+            # Not started (e.g. used outside the app lifecycle): encode off-loop directly
+            return await asyncio.to_thread(self.service.embed_question, text)
+
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, fut))
+        return await fut
+
+    async def _collect(self) -> List[tuple]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            texts = list(dict.fromkeys(t for t, _ in batch))
+
+            start = time.perf_counter()
+            try:
+                vecs = await asyncio.to_thread(self.service.encode, texts)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            self.encode_seconds += time.perf_counter() - start
+
+            self.batches += 1
+            self.items += len(batch)
+            if len(batch) >= self.max_batch:
+                self.full_batches += 1
+
+            by_text = {}
+            for text, vec in zip(texts, vecs):
+                self.service.remember(text, vec)
+                by_text[text] = vec
+            for text, fut in batch:
+                if not fut.done():
+                    fut.set_result(by_text[text])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns batch-fill metrics for the embedding queue."""
+        avg = self.items / self.batches if self.batches else 0.0
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(avg, 2),
+            "avg_batch_fill": round(avg / self.max_batch, 4),
+            "full_batches": self.full_batches,
+            "avg_encode_ms": round(1000 * self.encode_seconds / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait_ms,
+        }
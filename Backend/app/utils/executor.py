@@ -0,0 +1,44 @@
+# app/utils/executor.py
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class BlockingExecutor:
+    """
+    Runs blocking work (model inference, SQLite, Chroma, file parsing) off the
+    event loop.
+
+    Every operation class gets its own bounded thread pool, so e.g. a slow
+    document ingest can only ever occupy the "ingest" workers and never
+    starves the threads serving /query.
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = dict(limits)
+        self._pools = {
+            op: ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"{op}-worker")
+            for op, n in self.limits.items()
+        }
+        self._pending = {op: 0 for op in self.limits}
+
+    async def run(self, op: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run `fn(*args, **kwargs)` on the pool for `op` and await its result."""
+        pool = self._pools.get(op)
+        if pool is None:
+            raise ValueError(f"Unknown executor operation: {op}")
+        loop = asyncio.get_running_loop()
+        self._pending[op] += 1
+        try:
+            return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+        finally:
+            self._pending[op] -= 1
+
+    def shutdown(self) -> None:
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns worker limits and in-flight/queued calls per operation."""
+        return {op: {"workers": self.limits[op], "pending": self._pending[op]} for op in self.limits}
@@ -0,0 +1,187 @@
+# app/utils/job_manager.py
+import json
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+class JobStopped(Exception):
+    """Raised from `progress` after `shutdown()`, to abandon the current file."""
+
+
+class JobManager:
+    """
+    Background ingestion jobs with per-file progress, persisted in SQLite.
+
+    - `submit(paths)` records a job and hands it to a small worker pool.
+    - `worker(path, progress)` does the actual ingestion of one file and calls
+      `progress(**counters)` (e.g. pages_parsed, chunks_embedded, chunks_written).
+    - Jobs left queued/running by a previous process are picked up again by
+      `resume()`; files already finished are skipped.
+    - `shutdown()` stops workers between files and batches and leaves their
+      jobs running in SQLite, so they are resumed rather than marked failed.
+    """
+
+    FINISHED = ("done", "failed")
+
+    def __init__(self, db_path: str, worker: Callable[[str, Callable[..., None]], None], max_workers: int = 2):
+        self.db_path = db_path
+        self.worker = worker
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._stopping = threading.Event()
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs(
+                    id TEXT PRIMARY KEY,
+                    status TEXT,
+                    files TEXT,
+                    error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            conn.commit()
+
+    # --------------------------------------------
+    # persistence
+    # --------------------------------------------
+    def _save(self, job: Dict[str, Any]) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO jobs(id, status, files, error) VALUES(?,?,?,?)
+                ON CONFLICT(id) DO UPDATE SET
+                    status = excluded.status, files = excluded.files,
+                    error = excluded.error, updated_at = CURRENT_TIMESTAMP
+                """,
+                (job["id"], job["status"], json.dumps(job["files"]), job["error"]),
+            )
+            conn.commit()
+
+    @staticmethod
+    def _row_to_job(row) -> Dict[str, Any]:
+        return {"id": row[0], "status": row[1], "files": json.loads(row[2]), "error": row[3],
+                "created_at": row[4], "updated_at": row[5]}
+
+    def _snapshot(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        return json.loads(json.dumps(job))
+
+    # --------------------------------------------
+    # execution
+    # --------------------------------------------
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            self._save(job)
+
+        for path, state in job["files"].items():
+            if state["status"] == "done":
+                continue
+
+            def update(**counters):
+                with self._lock:
+                    state.update(counters)
+                    self._save(job)
+
+            def progress(**counters):
+                if self._stopping.is_set():
+                    raise JobStopped()
+                update(**counters)
+
+            try:
+                progress(status="running")
+                self.worker(path, progress)
+                update(status="done")
+            except JobStopped:
+                # Left "running" in SQLite; resume() redoes this file on next start
+                print(f"Ingestion job {job_id} stopped at {path}")
+                return
+            except Exception as e:
+                print(f"Ingestion job {job_id} failed on {path}: {e}")
+                with self._lock:
+                    state["status"] = "failed"
+                    state["error"] = str(e)
+                    job["error"] = f"{Path(path).name}: {e}"
+
+        with self._lock:
+            job["status"] = "failed" if job["error"] else "done"
+            self._save(job)
+            # Finished jobs are served from SQLite from now on
+            self._jobs.pop(job_id, None)
+
+    def submit(self, paths: List[str]) -> str:
+        """Queue ingestion of the given (already saved) files and return the job id."""
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "error": None,
+            "files": {
+                p: {"status": "queued", "pages_parsed": 0, "chunks_total": 0,
+                    "chunks_embedded": 0, "chunks_written": 0}
+                for p in paths
+            },
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._save(job)
+        self._pool.submit(self._run, job_id)
+        return job_id
+
+    def resume(self) -> int:
+        """Re-queue jobs that were still queued/running when the last process stopped."""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT id, status, files, error, created_at, updated_at FROM jobs "
+                "WHERE status IN ('queued', 'running')"
+            ).fetchall()
+        for row in rows:
+            job = self._row_to_job(row)
+            job["status"] = "queued"
+            with self._lock:
+                self._jobs[job["id"]] = {k: job[k] for k in ("id", "status", "error", "files")}
+            self._pool.submit(self._run, job["id"])
+        if rows:
+            print(f"Resumed {len(rows)} unfinished ingestion job(s).")
+        return len(rows)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the current state of a job, or None if it does not exist."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return self._snapshot(job)
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT id, status, files, error, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return the most recent jobs, newest first."""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT id, status, files, error, created_at, updated_at FROM jobs "
+                "ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._row_to_job(r) for r in rows]
+
+    def shutdown(self) -> None:
+        """
+        Stop the workers and wait for them. A running job stops at its next
+        file or batch; unfinished jobs stay queued/running in SQLite and are
+        resumed on next start.
+        """
+        self._stopping.set()
+        self._pool.shutdown(wait=True, cancel_futures=True)
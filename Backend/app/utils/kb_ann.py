@@ -0,0 +1,127 @@
+# app/utils/kb_ann.py
+import hashlib
+import os
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class KBAnnIndex:
+    """
+    Approximate nearest-neighbour index over KB question embeddings (hnswlib, cosine).
+
+    - Labels are the qa_pairs row ids, so adds/removes are incremental and
+      no position bookkeeping is shared with the exact-scan cache.
+    - Saved as `<path>` plus `<path>.meta.npz` (live ids and a fingerprint of
+      the indexed rows); `load` only accepts the file if the fingerprint still
+      matches the DB, otherwise the caller rebuilds.
+    - Requires the `hnswlib` package.
+    """
+
+    def __init__(self, dim: int, path: Optional[str] = None, m: int = 16, ef_construction: int = 200,
+                 ef_search: int = 64):
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("KB_ANN=1 requires the hnswlib package (pip install hnswlib)") from e
+
+        self._hnswlib = hnswlib
+        self.dim = dim
+        self.path = path
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._live: set = set()
+        self._deleted: set = set()
+        self._dirty = False
+        self._new_index(1024)
+
+    def _new_index(self, capacity: int) -> None:
+        self._index = self._hnswlib.Index(space="cosine", dim=self.dim)
+        self._index.init_index(max_elements=capacity, ef_construction=self.ef_construction, M=self.m)
+        self._index.set_ef(self.ef_search)
+        self._live, self._deleted = set(), set()
+
+    @property
+    def dirty(self) -> bool:
+        """True when there are changes not yet saved to disk."""
+        return self._dirty
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    @staticmethod
+    def fingerprint(ids: List[int], vectors: np.ndarray) -> str:
+        """Hash of (id, vector) rows, independent of row order."""
+        ids = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(ids)
+        h = hashlib.sha1(ids[order].tobytes())
+        h.update(np.ascontiguousarray(vectors[:len(ids)][order], dtype=np.float32).tobytes())
+        return h.hexdigest()
+
+    def load(self, fingerprint: str) -> bool:
+        """Load the saved index if it was saved with this fingerprint; returns False otherwise."""
+        meta_path = f"{self.path}.meta.npz"
+        if not self.path or not os.path.exists(self.path) or not os.path.exists(meta_path):
+            return False
+        with np.load(meta_path) as meta:
+            if str(meta["fingerprint"]) != fingerprint:
+                return False
+            saved = set(meta["ids"].tolist())
+        self._index = self._hnswlib.Index(space="cosine", dim=self.dim)
+        self._index.load_index(self.path, max_elements=max(1024, len(saved)))
+        self._index.set_ef(self.ef_search)
+        self._live = saved
+        self._deleted = set(self._index.get_ids_list()) - saved
+        self._dirty = False
+        return True
+
+    def rebuild(self, ids: List[int], vectors: np.ndarray) -> None:
+        """Replace the index contents with these rows."""
+        self._new_index(max(1024, len(ids)))
+        self.add(ids, vectors)
+
+    def add(self, ids: List[int], vectors: np.ndarray) -> None:
+        """Insert rows, or overwrite the vector of ids already present."""
+        if not len(ids):
+            return
+        for qa_id in ids:
+            if qa_id in self._deleted:
+                self._index.unmark_deleted(qa_id)
+                self._deleted.discard(qa_id)
+        self._live.update(ids)
+        needed = len(self._live) + len(self._deleted)
+        if needed > self._index.get_max_elements():
+            self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+        self._index.add_items(np.asarray(vectors, dtype=np.float32), np.asarray(ids, dtype=np.int64))
+        self._dirty = True
+
+    def remove(self, ids: Iterable[int]) -> None:
+        for qa_id in ids:
+            if qa_id in self._live:
+                self._index.mark_deleted(qa_id)
+                self._live.discard(qa_id)
+                self._deleted.add(qa_id)
+                self._dirty = True
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Return up to k (id, cosine similarity) pairs, best first."""
+        k = min(k, len(self._live))
+        if not k:
+            return []
+        self._index.set_ef(max(self.ef_search, k))
+        labels, dists = self._index.knn_query(np.asarray(vector, dtype=np.float32), k=k)
+        return [(int(i), 1.0 - float(d)) for i, d in zip(labels[0], dists[0])]
+
+    def persist(self, fingerprint: str) -> None:
+        """Save the index, tagged with the fingerprint of the rows it holds."""
+        if not self.path or not self._dirty:
+            return
+        tmp = f"{self.path}.tmp"
+        self._index.save_index(tmp)
+        os.replace(tmp, self.path)
+        tmp = f"{self.path}.meta.tmp.npz"
+        np.savez(tmp, ids=np.fromiter(self._live, dtype=np.int64, count=len(self._live)),
+                 fingerprint=np.array(fingerprint))
+        os.replace(tmp, f"{self.path}.meta.npz")
+        self._dirty = False
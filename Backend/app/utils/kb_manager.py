@@ -1,10 +1,26 @@
 # app/utils/kb_manager.py
-import sqlite3
+import re
+import threading
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple
 
-from sentence_transformers import SentenceTransformer, util
-import torch
+import numpy as np
+
+from app.utils.embeddings import EmbeddingService
+from app.utils.kb_ann import KBAnnIndex
+from app.utils.sqlite_pool import SQLitePool
+
+_APOSTROPHE_RE = re.compile(r"['\u2019]")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_question(question: str) -> str:
+    """
+    Key for exact matching: casefolded, apostrophes dropped ("what's" == "whats"),
+    other punctuation treated as a space, whitespace collapsed.
+    """
+    text = _APOSTROPHE_RE.sub("", question.casefold())
+    return " ".join(_PUNCT_RE.sub(" ", text).split())
 
 
 class KnowledgeBaseManager:
@@ -12,22 +28,48 @@ class KnowledgeBaseManager:
     Simple SQLite-backed QA store with an in-memory embedding cache for fast semantic lookup.
 
     - Stores (question, answer, tags) in SQLite.
-    - Keeps an in-memory cache of (question, answer, embedding_tensor) to avoid
-      repeatedly encoding DB questions at query time.
+    - Keeps one contiguous, L2-normalized float32 matrix of question embeddings
+      plus parallel id/answer lists, so a lookup is a single matrix-vector
+      product with no per-query allocation of the DB side.
+    - Persists each question embedding as a BLOB next to its row, tagged with
+      the model it came from, so startup only encodes missing/stale rows.
+    - All SQL goes through a pool of persistent WAL-mode connections.
+    - A dict from normalized question to (id, answer) answers exact matches
+      without SQL or embedding.
+    - Optionally mirrors the matrix into an HNSW index (`ann=True`) that
+      replaces the exact scan once the KB has `ann_min_size` pairs.
     """
 
-    def __init__(self, db_path: str = "./data/knowledge_base.db"):
+    def __init__(self, db_path: str = "./data/knowledge_base.db", embedder: Optional[EmbeddingService] = None,
+                 pool_size: int = 4, ann: bool = False, ann_path: Optional[str] = None,
+                 ann_min_size: int = 10000):
         self.db_path = db_path
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._pool = SQLitePool(self.db_path, size=pool_size)
 
-        # SentenceTransformer model for embeddings
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+        # Shared embedding model (loaded here only when none is injected)
+        self.embedder = embedder or EmbeddingService()
 
-        # in-memory cache: list[ (question, answer, embedding_tensor) ]
-        self._cache: List[Tuple[str, str, torch.Tensor]] = []
+        # in-memory cache: row i of _emb belongs to _ids[i] / _answers[i]
+        self._dim = self.embedder.dim
+        # stored embeddings are reused only if written by this exact model (name + weights hash)
+        self._emb_tag = f"{self.embedder.model_id}:{self._dim}"
+        self._emb = np.zeros((0, self._dim), dtype=np.float32)
+        self._ids: List[int] = []
+        self._answers: List[str] = []
+        # row id -> position in _emb/_ids/_answers
+        self._pos: Dict[int, int] = {}
+        # normalized question -> [(id, answer)] oldest first; id -> its normalized question
+        self._exact: Dict[str, List[Tuple[int, str]]] = {}
+        self._norm_of: Dict[int, str] = {}
+        # guards the cache arrays; endpoints call in from worker threads
+        self._lock = threading.Lock()
+        # approximate index over the same rows, labelled by row id
+        self._ann = KBAnnIndex(self._dim, ann_path) if ann else None
+        self.ann_min_size = ann_min_size
 
         # Ensure table exists
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.connection() as conn:
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS qa_pairs(
@@ -39,99 +81,339 @@ class KnowledgeBaseManager:
                 )
                 """
             )
-            conn.commit()
+            # Older databases predate the persisted embedding columns
+            cols = {r[1] for r in conn.execute("PRAGMA table_info(qa_pairs)")}
+            if "embedding" not in cols:
+                conn.execute("ALTER TABLE qa_pairs ADD COLUMN embedding BLOB")
+            if "embedding_model" not in cols:
+                conn.execute("ALTER TABLE qa_pairs ADD COLUMN embedding_model TEXT")
+            # Exact matches are served from memory, but SQL lookups by question stay indexed
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_qa_pairs_question ON qa_pairs(question)")
 
         # build cache once at startup
         self._build_cache()
 
+    @property
+    def _size(self) -> int:
+        return len(self._ids)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.embedder.encode(texts)
+
+    def _append(self, qa_id: int, answer: str, emb: np.ndarray) -> None:
+        """Append one row to the matrix, doubling its capacity when full (amortized O(1))."""
+        n = self._size
+        if n == len(self._emb):
+            grown = np.zeros((max(64, 2 * n), self._dim), dtype=np.float32)
+            grown[:n] = self._emb[:n]
+            self._emb = grown
+        self._emb[n] = emb
+        self._ids.append(qa_id)
+        self._answers.append(answer)
+        self._pos[qa_id] = n
+        if self._ann is not None:
+            self._ann.add([qa_id], emb[None, :])
+
+    def _remove(self, qa_id: int) -> None:
+        """Drop one row from the cache in O(1) by moving the last row into its slot."""
+        i = self._pos.pop(qa_id, None)
+        if i is None:
+            return
+        if self._ann is not None:
+            self._ann.remove([qa_id])
+        last = self._size - 1
+        if i != last:
+            self._emb[i] = self._emb[last]
+            self._ids[i] = self._ids[last]
+            self._answers[i] = self._answers[last]
+            self._pos[self._ids[i]] = i
+        self._ids.pop()
+        self._answers.pop()
+
+    def _index_exact(self, qa_id: int, question: str, answer: str) -> None:
+        norm = normalize_question(question)
+        self._exact.setdefault(norm, []).append((qa_id, answer))
+        self._norm_of[qa_id] = norm
+
+    def _unindex_exact(self, qa_id: int) -> None:
+        norm = self._norm_of.pop(qa_id, None)
+        if norm is None:
+            return
+        rest = [e for e in self._exact[norm] if e[0] != qa_id]
+        if rest:
+            self._exact[norm] = rest
+        else:
+            del self._exact[norm]
+
     def _build_cache(self) -> None:
-        """Load all QA pairs from DB and compute embeddings for the questions."""
-        self._cache = []
-        with sqlite3.connect(self.db_path) as conn:
-            cur = conn.execute("SELECT question, answer FROM qa_pairs")
+        """
+        Load all QA pairs and their stored embeddings from the DB.
+        Only rows whose embedding is missing or was produced by another model
+        are encoded, and the fresh vectors are written back.
+
+        Everything is built aside and swapped in under the lock, so concurrent
+        queries keep seeing the previous cache until the new one is ready.
+        """
+        with self._pool.connection() as conn:
+            cur = conn.execute("SELECT id, question, answer, embedding, embedding_model FROM qa_pairs ORDER BY id")
             rows = cur.fetchall()
-        if not rows:
-            return
 
-        questions = [r[0] for r in rows]
-        try:
-            embs = self.model.encode(questions, convert_to_tensor=True)
-        except Exception:
-            # fallback: encode one-by-one (slower) to avoid OOM on some environments
-            embs_list = []
-            for q in questions:
-                emb = self.model.encode(q, convert_to_tensor=True)
-                embs_list.append(emb)
-            embs = torch.stack(embs_list)
+        nbytes = self._dim * 4
+        embs = np.empty((len(rows), self._dim), dtype=np.float32)
+        stale = []
+        for i, (_, _, _, blob, tag) in enumerate(rows):
+            if tag == self._emb_tag and blob is not None and len(blob) == nbytes:
+                embs[i] = np.frombuffer(blob, dtype=np.float32)
+            else:
+                stale.append(i)
 
-        # Pair each DB row with its embedding tensor
-        for (q, a), emb in zip(rows, embs):
-            self._cache.append((q, a, emb))
+        if stale:
+            print(f"Encoding {len(stale)} of {len(rows)} KB questions (missing or stale embeddings)...")
+            questions = [rows[i][1] for i in stale]
+            try:
+                fresh = self._encode(questions)
+            except Exception:
+                # fallback: encode one-by-one (slower) to avoid OOM on some environments
+                fresh = np.vstack([self._encode([q]) for q in questions])
+            embs[stale] = fresh
+            with self._pool.connection() as conn:
+                conn.executemany(
+                    "UPDATE qa_pairs SET embedding = ?, embedding_model = ? WHERE id = ?",
+                    [(fresh[j].tobytes(), self._emb_tag, rows[i][0]) for j, i in enumerate(stale)],
+                )
 
-    def add_qa_pair(self, q: str, a: str, tags: Optional[str]) -> None:
-        """Insert a new QA pair into the DB and append its question embedding to the cache."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "INSERT INTO qa_pairs(question, answer, tags) VALUES(?,?,?)",
-                (q, a, tags),
-            )
-            conn.commit()
+        ids = [r[0] for r in rows]
+        exact: Dict[str, List[Tuple[int, str]]] = {}
+        norm_of: Dict[int, str] = {}
+        for qa_id, q, a, _, _ in rows:
+            norm = normalize_question(q)
+            exact.setdefault(norm, []).append((qa_id, a))
+            norm_of[qa_id] = norm
+
+        ann = self._ann
+        if ann is not None:
+            ann = KBAnnIndex(ann.dim, ann.path, m=ann.m, ef_construction=ann.ef_construction,
+                             ef_search=ann.ef_search)
+            if not ann.load(KBAnnIndex.fingerprint(ids, embs)):
+                if ids:
+                    print(f"Building KB ANN index over {len(ids)} questions...")
+                ann.rebuild(ids, embs)
+                ann.persist(KBAnnIndex.fingerprint(ids, embs))
 
-        # compute embedding for the new question and append to cache
+        with self._lock:
+            self._emb = embs
+            self._ids = ids
+            self._answers = [r[2] for r in rows]
+            self._pos = {qa_id: i for i, qa_id in enumerate(ids)}
+            self._exact, self._norm_of = exact, norm_of
+            self._ann = ann
+
+    def add_qa_pair(self, q: str, a: str, tags: Optional[str]) -> None:
+        """Insert a new QA pair (with its question embedding) and append it to the cache."""
         try:
-            emb = self.model.encode(q, convert_to_tensor=True)
-            self._cache.append((q, a, emb))
+            emb = self._encode([q])[0]
         except Exception:
-            # If embedding fails, skip caching (DB still contains the record)
-            pass
+            # If embedding fails, store the row anyway; it is encoded on next startup
+            emb = None
+
+        with self._pool.connection() as conn:
+            cur = conn.execute(
+                "INSERT INTO qa_pairs(question, answer, tags, embedding, embedding_model) VALUES(?,?,?,?,?)",
+                (q, a, tags, None if emb is None else emb.tobytes(), None if emb is None else self._emb_tag),
+            )
+            qa_id = cur.lastrowid
+
+        with self._lock:
+            self._index_exact(qa_id, q, a)
+            if emb is not None:
+                self._append(qa_id, a, emb)
+
+    def add_qa_pairs(self, pairs: Iterable[Tuple[str, str, Optional[str]]], batch_size: int = 256,
+                     skip_existing: bool = False) -> int:
+        """
+        Bulk insert (question, answer, tags) tuples; pairs missing a question
+        or answer are skipped. Returns the number of pairs added.
+
+        - `pairs` is consumed lazily, so large imports stream from the parser.
+        - With `skip_existing`, pairs whose normalized question already has the
+          same answer in the KB (or earlier in `pairs`) are skipped, so
+          re-running an import (e.g. a resumed ingest job) adds no duplicates.
+        - Questions are encoded `batch_size` at a time before any write, so
+          model inference never holds the DB write lock. Embeddings are staged
+          in one float32 matrix (grown by doubling), i.e. no more memory than
+          the cache keeps for these pairs afterwards.
+        - Everything is written in one short transaction, and the in-memory
+          cache is updated only after it commits; if it fails, nothing is stored.
+        """
+        staged: List[Tuple[str, str, Optional[str]]] = []
+        embs = np.empty((0, self._dim), dtype=np.float32)
+        batch: List[Tuple[str, str, Optional[str]]] = []
+        seen = set()
+
+        def stage(batch):
+            nonlocal embs
+            n, m = len(staged), len(batch)
+            if n + m > len(embs):
+                grown = np.empty((max(2 * len(embs), n + m), self._dim), dtype=np.float32)
+                grown[:n] = embs[:n]
+                embs = grown
+            embs[n:n + m] = self._encode([q for q, _, _ in batch])
+            staged.extend(batch)
+
+        for q, a, tags in pairs:
+            q, a = (q or "").strip(), (a or "").strip()
+            if not q or not a:
+                continue
+            if skip_existing:
+                key = (normalize_question(q), a)
+                if key in seen or self._has_pair(*key):
+                    continue
+                seen.add(key)
+            batch.append((q, a, tags))
+            if len(batch) >= batch_size:
+                stage(batch)
+                batch = []
+        if batch:
+            stage(batch)
+        if not staged:
+            return 0
+
+        ids = []
+        with self._pool.connection() as conn:
+            for (q, a, tags), emb in zip(staged, embs):
+                cur = conn.execute(
+                    "INSERT INTO qa_pairs(question, answer, tags, embedding, embedding_model) VALUES(?,?,?,?,?)",
+                    (q, a, tags, emb.tobytes(), self._emb_tag),
+                )
+                ids.append(cur.lastrowid)
+
+        with self._lock:
+            for qa_id, (q, a, _), emb in zip(ids, staged, embs):
+                self._index_exact(qa_id, q, a)
+                self._append(qa_id, a, emb)
+        self.persist_ann()
+        return len(ids)
+
+    def _has_pair(self, norm: str, answer: str) -> bool:
+        with self._lock:
+            return any(a == answer for _, a in self._exact.get(norm, ()))
 
     def get_all_qa_pairs(self) -> List[Dict]:
         """Return a list of all QA pairs from the DB."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.connection() as conn:
             cur = conn.execute("SELECT id, question, answer, tags FROM qa_pairs")
             rows = cur.fetchall()
         return [{"id": r[0], "question": r[1], "answer": r[2], "tags": r[3]} for r in rows]
 
+    def count(self) -> int:
+        """Number of QA pairs in the DB."""
+        with self._pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM qa_pairs").fetchone()[0]
+
+    def persist_ann(self) -> None:
+        """Save the ANN index if it has unsaved changes (no-op when disabled)."""
+        if self._ann is not None:
+            with self._lock:
+                if self._ann.dirty:
+                    self._ann.persist(KBAnnIndex.fingerprint(self._ids, self._emb))
+
+    def close(self) -> None:
+        """Save the ANN index and close the pooled DB connections."""
+        self.persist_ann()
+        self._pool.close()
+
+    def update_qa_pair(self, qa_id: int, q: str, a: str, tags: Optional[str]) -> bool:
+        """Update a QA pair in place; only its own embedding is recomputed."""
+        try:
+            emb = self._encode([q])[0]
+        except Exception:
+            emb = None
+
+        with self._pool.connection() as conn:
+            cur = conn.execute(
+                "UPDATE qa_pairs SET question = ?, answer = ?, tags = ?, embedding = ?, embedding_model = ? "
+                "WHERE id = ?",
+                (q, a, tags, None if emb is None else emb.tobytes(), None if emb is None else self._emb_tag, qa_id),
+            )
+        if not cur.rowcount:
+            return False
+
+        with self._lock:
+            self._remove(qa_id)
+            self._unindex_exact(qa_id)
+            self._index_exact(qa_id, q, a)
+            if emb is not None:
+                self._append(qa_id, a, emb)
+        return True
+
     def delete_qa_pair(self, qa_id: int) -> None:
-        """Delete a QA pair by id and rebuild the in-memory cache."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("DELETE FROM qa_pairs WHERE id = ?", (qa_id,))
-            conn.commit()
-        # Rebuild cache for simplicity (could be optimized to remove single entry)
-        self._build_cache()
+        """Delete a QA pair by id and drop its entry from the in-memory cache."""
+        self.delete_qa_pairs([qa_id])
+
+    def delete_qa_pairs(self, qa_ids: List[int]) -> int:
+        """Delete several QA pairs in one transaction. Returns the number of rows deleted."""
+        if not qa_ids:
+            return 0
+        with self._pool.connection() as conn:
+            cur = conn.executemany("DELETE FROM qa_pairs WHERE id = ?", [(i,) for i in qa_ids])
+        with self._lock:
+            for qa_id in qa_ids:
+                self._remove(qa_id)
+                self._unindex_exact(qa_id)
+        return cur.rowcount
+
+    def get_exact_answer(self, question: str) -> Optional[str]:
+        """Answer of the oldest pair whose normalized question equals this one, else None."""
+        with self._lock:
+            hits = self._exact.get(normalize_question(question))
+            return hits[0][1] if hits else None
 
     def get_best_answer(self, question: str) -> Tuple[Optional[str], float]:
         """
         Return the best-matching answer and a similarity score in [0,1].
 
-        - If an exact question match exists in the DB, return it with score 1.0.
+        - If the normalized question matches a stored one, return it with score 1.0.
         - Otherwise, compute semantic similarity against cached embeddings (fast).
           Returns (None, 0.0) when no KB entries exist.
         """
         # Exact match first
-        with sqlite3.connect(self.db_path) as conn:
-            cur = conn.execute("SELECT answer FROM qa_pairs WHERE question = ?", (question,))
-            row = cur.fetchone()
-            if row:
-                return row[0], 1.0
+        answer = self.get_exact_answer(question)
+        if answer is not None:
+            return answer, 1.0
 
         # Semantic fallback using cached embeddings
-        if not self._cache:
+        top = self.get_top_answers(question, k=1)
+        if not top:
             return None, 0.0
+        return top[0][1], top[0][2]
+
+    def get_top_answers(self, question: str, k: int = 1) -> List[Tuple[int, str, float]]:
+        """
+        Return up to k (id, answer, score) tuples ordered by cosine similarity.
+        Returns [] when no KB entries exist or the question cannot be embedded.
+        """
+        if not self._size:
+            return []
 
         try:
-            q_emb = self.model.encode(question, convert_to_tensor=True)
+            q_emb = self.embedder.embed_question(question)
         except Exception:
             # If embedding fails, return no answer
-            return None, 0.0
+            return []
 
-        # Build a tensor of DB embeddings and compute cosine similarities
-        try:
-            db_embs = torch.stack([t[2] for t in self._cache])
-            scores = util.pytorch_cos_sim(q_emb, db_embs).squeeze(0)
-            best_idx = int(torch.argmax(scores).item())
-            best_score = float(scores[best_idx].item())
-            best_ans = self._cache[best_idx][1]
-            return best_ans, best_score
-        except Exception:
-            return None, 0.0
+        with self._lock:
+            n = self._size
+            if not n:
+                return []
+            if self._ann is not None and n >= self.ann_min_size:
+                return [(qa_id, self._answers[self._pos[qa_id]], score)
+                        for qa_id, score in self._ann.search(q_emb, k)]
+            # Rows are pre-normalized, so the dot product is the cosine similarity
+            scores = self._emb[:n] @ q_emb
+            k = min(k, n)
+            if k == 1:
+                idx = [int(np.argmax(scores))]
+            else:
+                part = np.argpartition(-scores, k - 1)[:k]
+                idx = part[np.argsort(-scores[part])].tolist()
+            return [(self._ids[i], self._answers[i], float(scores[i])) for i in idx]
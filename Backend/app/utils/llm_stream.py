@@ -0,0 +1,95 @@
+# app/utils/llm_stream.py
+import json
+import re
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import httpx
+
+
+def clean_llm_output(text: str) -> str:
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\s+([,.;!?'\"])", r"\1", text)
+    text = re.sub(r"(\w)\s+'\s*(\w)", r"\1'\2", text)
+    return "\n".join([line.strip() for line in text.splitlines()]).strip()
+
+
+def format_sse(data: str, event: str):
+    return f"event: {event}\ndata: {json.dumps({'text': data})}\n\n"
+
+
+async def iter_llm_deltas(response: httpx.Response):
+    """
+    Yield content deltas from an OpenAI-style SSE chat-completions stream.
+    Stops at the `[DONE]` sentinel; malformed lines are skipped.
+    """
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(chunk, dict):
+            continue
+        choices = chunk.get("choices") or [{}]
+        delta = (choices[0].get("delta") or {}).get("content")
+        if delta:
+            yield delta
+
+
+async def batch_words(deltas):
+    """
+    Re-chunk raw LLM deltas on word boundaries so the client receives whole
+    words instead of sub-word tokens. Whatever is left is flushed at the end.
+    """
+    pending = ""
+    async for delta in deltas:
+        pending += delta
+        cut = max(pending.rfind(" "), pending.rfind("\n"))
+        if cut >= 0:
+            yield pending[:cut + 1]
+            pending = pending[cut + 1:]
+    if pending:
+        yield pending
+
+
+async def stream_chat(client: httpx.AsyncClient, url: str, headers: Dict[str, str], body: Dict[str, Any],
+                      on_answer: Optional[Callable[[str], None]] = None) -> AsyncIterator[str]:
+    """
+    Proxy a streaming chat completion as SSE for the frontend.
+
+    - Each word-batched delta is sent as a `token` event.
+    - The cleaned full answer is sent once at the end as `final_response`
+      (and handed to `on_answer`, e.g. to cache it).
+    - Upstream errors are reported as a `final_response` event.
+    """
+    try:
+        async with client.stream("POST", url, headers=headers, json=body) as response:
+            print("HF STATUS:", response.status_code)
+
+            if response.status_code != 200:
+                err = (await response.aread()).decode("utf-8", errors="ignore")
+                yield format_sse(f"HF Error {response.status_code}: {err}", "final_response")
+                return
+
+            # Forward upstream deltas as they arrive, batched per word
+            parts = []
+            async for piece in batch_words(iter_llm_deltas(response)):
+                parts.append(piece)
+                yield format_sse(piece, "token")
+
+        answer = clean_llm_output("".join(parts))
+        if not answer:
+            yield format_sse("Unexpected HF response: empty answer", "final_response")
+            return
+
+        if on_answer is not None:
+            on_answer(answer)
+        # Send final_response with complete answer only once at the end
+        yield format_sse(answer, "final_response")
+
+    except Exception as e:
+        yield format_sse(f"Error: {str(e)}", "final_response")
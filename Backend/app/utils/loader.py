@@ -1,28 +1,37 @@
 # app/utils/loader.py
+import multiprocessing
 import os
 import re
-from typing import List
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, CSVLoader, Docx2txtLoader
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterable, Iterator, List, Optional, Tuple
+from langchain_community.document_loaders import TextLoader, CSVLoader, Docx2txtLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
 
+# Hyphen + newline (word broken across lines), plus any indentation after it
+_HYPHEN_BREAK = re.compile(r"-\n\s*")
+
+
 def normalize_text(text: str) -> str:
     """
     - Rejoin hyphenated line breaks (e.g. "exam-\nple" -> "example")
     - Collapse multiple whitespace/newlines into single spaces
     - Trim leading/trailing whitespace
+
+    Each rewrite only runs when its trigger is present, and split/join
+    collapses and trims whitespace in a single C-level pass.
     """
     if not text:
         return text
     # Remove soft hyphen and zero-width spaces if present
-    text = text.replace("\u00AD", "")
-    text = text.replace("\u200B", "")
-    # Remove hyphen + newline (word broken across lines)
-    text = re.sub(r'-\n\s*', '', text)
-    # Collapse all whitespace characters into single spaces
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    if "\u00AD" in text:
+        text = text.replace("\u00AD", "")
+    if "\u200B" in text:
+        text = text.replace("\u200B", "")
+    if "-\n" in text:
+        text = _HYPHEN_BREAK.sub("", text)
+    return " ".join(text.split())
 
 
 class SimpleMarkdownLoader:
@@ -58,8 +67,7 @@ def load_and_split(path: str) -> List[Document]:
     """
     ext = os.path.splitext(path)[1].lower()
     if ext == ".pdf":
-        loader = PyPDFLoader(path)
-        docs = loader.load() if hasattr(loader, "load") else loader.load_and_split()
+        return list(iter_pdf_chunks(path))
     elif ext == ".txt":
         loader = TextLoader(path, encoding="utf-8")
         docs = loader.load()
@@ -77,15 +85,118 @@ def load_and_split(path: str) -> List[Document]:
 
     docs = _ensure_list(docs)
 
-    # Normalize each doc's text defensively
-    for d in docs:
-        if getattr(d, "page_content", None) is not None:
-            d.page_content = normalize_text(d.page_content)
+    # SimpleMarkdownLoader already normalizes; other loaders return raw text
+    if ext != ".md":
+        for d in docs:
+            if getattr(d, "page_content", None) is not None:
+                d.page_content = normalize_text(d.page_content)
+
+    return split_documents(docs)
+
+
+_SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=1000,
+    chunk_overlap=200,
+    separators=["\n\n", "\n", ". ", "? ", "! ", " ", ""]
+)
+
+
+def split_documents(docs: List[Document]) -> List[Document]:
+    """Split normalized Documents into the chunk size used across the index."""
+    return _SPLITTER.split_documents(docs)
+
+
+def iter_pdf_chunks(path: str, start: int = 0, stop: Optional[int] = None) -> Iterator[Document]:
+    """
+    Yield normalized, split chunks of a PDF one page at a time using PyMuPDF.
+    Only the current page's text is held in memory, whatever the document size.
+    """
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as pdf:
+        stop = len(pdf) if stop is None else min(stop, len(pdf))
+        for i in range(start, stop):
+            text = normalize_text(pdf.load_page(i).get_text())
+            if text:
+                yield from split_documents([Document(page_content=text, metadata={"source": path, "page": i})])
+
+
+def iter_load_and_split(path: str) -> Iterator[Document]:
+    """Streaming variant of load_and_split: PDFs are read page by page."""
+    if path.lower().endswith(".pdf"):
+        return iter_pdf_chunks(path)
+    return iter(load_and_split(path))
+
+
+def load_pdf_pages(path: str, start: int, stop: int) -> List[Document]:
+    """Load, normalize and split pages [start, stop) of a PDF."""
+    return list(iter_pdf_chunks(path, start, stop))
+
+
+def _pdf_page_count(path: str) -> int:
+    import fitz  # PyMuPDF
+
+    try:
+        with fitz.open(path) as pdf:
+            return len(pdf)
+    except Exception:
+        return 0
+
+
+def _plan_tasks(paths: Iterable[str], pages_per_task: int) -> List[Tuple]:
+    """One task per file; large PDFs are cut into page ranges."""
+    tasks = []
+    for path in paths:
+        if path.lower().endswith(".pdf"):
+            pages = _pdf_page_count(path)
+            if pages > pages_per_task:
+                tasks.extend((load_pdf_pages, path, s, s + pages_per_task)
+                             for s in range(0, pages, pages_per_task))
+                continue
+        tasks.append((load_and_split, path))
+    return tasks
+
+
+def iter_split_parallel(paths: Iterable[str], max_workers: Optional[int] = None,
+                        pages_per_task: int = 32) -> Iterator[Tuple[str, List[Document], Optional[str]]]:
+    """
+    Parse and split many files in a process pool, yielding each task's
+    (path, chunks, error) as soon as it finishes so the caller can embed while
+    parsing continues.
+
+    At most 2 x max_workers tasks are in flight, which bounds the number of
+    chunk lists held in memory. A task that fails to parse yields
+    (path, [], error message); for a large PDF that is one page range, so the
+    caller must treat the whole file as incomplete.
+
+    Workers are spawned rather than forked: the server process has torch,
+    tokenizer and executor threads running, and forking it can deadlock the
+    children. Without `max_workers`, half the CPUs (at most 4) are used so
+    parsing leaves room for the query workers.
+    """
+    max_workers = max_workers or min(4, max(1, (os.cpu_count() or 1) // 2))
+    tasks = _plan_tasks(paths, pages_per_task)
+    if not tasks:
+        return
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        separators=["\n\n", "\n", ". ", "? ", "! ", " ", ""]
-    )
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = {}
+        queue = iter(tasks)
+        while True:
+            for fn, *args in queue:
+                pending[pool.submit(fn, *args)] = args[0]
+                if len(pending) >= 2 * max_workers:
+                    break
+            if not pending:
+                return
 
-    return splitter.split_documents(docs)
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                path = pending.pop(fut)
+                try:
+                    chunks = fut.result()
+                except Exception as e:
+                    print(f"Failed to load {path}: {e}")
+                    yield path, [], str(e)
+                else:
+                    yield path, chunks, None
@@ -0,0 +1,89 @@
+# app/utils/manifest.py
+import hashlib
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class IndexManifest:
+    """
+    SQLite record of what is in the vector index: file path -> content hash -> chunk ids.
+
+    Used by the incremental sync to re-embed only added/changed files and to
+    drop the chunks of removed ones. Size and mtime are stored as well so an
+    untouched file is recognised without re-hashing it.
+    """
+
+    def __init__(self, db_path: str = "./data/index_manifest.db"):
+        self.db_path = db_path
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS files(
+                    path TEXT PRIMARY KEY,
+                    sha256 TEXT,
+                    size INTEGER,
+                    mtime REAL,
+                    chunk_ids TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            conn.commit()
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    def get_all(self) -> Dict[str, Dict]:
+        """Return {path: {sha256, size, mtime, chunk_ids}} for every indexed file."""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute("SELECT path, sha256, size, mtime, chunk_ids FROM files").fetchall()
+        return {
+            r[0]: {"sha256": r[1], "size": r[2], "mtime": r[3], "chunk_ids": json.loads(r[4] or "[]")}
+            for r in rows
+        }
+
+    def is_current(self, path: str, entry: Optional[Dict]) -> bool:
+        """True if `path` still has the content recorded in `entry`."""
+        if entry is None:
+            return False
+        st = os.stat(path)
+        if st.st_size == entry["size"] and st.st_mtime == entry["mtime"]:
+            return True
+        return st.st_size == entry["size"] and self.file_hash(path) == entry["sha256"]
+
+    def record(self, path: str, chunk_ids: List[str]) -> None:
+        """Store the current hash/size/mtime of `path` and the ids of its chunks."""
+        st = os.stat(path)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO files(path, sha256, size, mtime, chunk_ids) VALUES(?,?,?,?,?)
+                ON CONFLICT(path) DO UPDATE SET
+                    sha256 = excluded.sha256, size = excluded.size, mtime = excluded.mtime,
+                    chunk_ids = excluded.chunk_ids, updated_at = CURRENT_TIMESTAMP
+                """,
+                (path, self.file_hash(path), st.st_size, st.st_mtime, json.dumps(chunk_ids)),
+            )
+            conn.commit()
+
+    def remove(self, path: str) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            conn.commit()
+
+    def close(self) -> None:
+        """Nothing to release: every call opens and closes its own connection."""
+
+    def clear(self) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM files")
+            conn.commit()
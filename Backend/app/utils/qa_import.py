@@ -0,0 +1,60 @@
+# app/utils/qa_import.py
+import csv
+import json
+import re
+from typing import IO, Iterator, Optional, Tuple
+
+QAPair = Tuple[str, str, Optional[str]]
+
+# "Q: ...\nA: ..." blocks in Markdown FAQs
+_MD_QA_RE = re.compile(r"Q:\s*(.*?)\nA:\s*(.*?)(?:\n{1,}|$)", re.DOTALL)
+
+
+def iter_qa_markdown(text: str) -> Iterator[QAPair]:
+    """Yield (question, answer, "") for every Q:/A: block in Markdown text."""
+    for m in _MD_QA_RE.finditer(text):
+        yield m.group(1).strip(), m.group(2).strip(), ""
+
+
+def iter_qa_jsonl(fh: IO[str]) -> Iterator[QAPair]:
+    """
+    Yield pairs from JSON Lines: one {"question", "answer", "tags"} object per line.
+    Blank lines are ignored; numbers are accepted as text and tags may be a
+    string or a list of strings. Any other shape raises ValueError.
+    """
+    for n, line in enumerate(fh, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {n}: {e}") from e
+        if not isinstance(row, dict):
+            raise ValueError(f"Line {n} is not a JSON object")
+        yield (_text(row.get("question"), "question", n), _text(row.get("answer"), "answer", n),
+               _tags(row.get("tags"), n))
+
+
+def iter_qa_csv(fh: IO[str]) -> Iterator[QAPair]:
+    """Yield pairs from CSV with a header row containing question, answer and optionally tags."""
+    reader = csv.DictReader(fh)
+    missing = {"question", "answer"} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"CSV header is missing column(s): {', '.join(sorted(missing))}")
+    for row in reader:
+        yield row.get("question"), row.get("answer"), _tags(row.get("tags"))
+
+
+def _text(value, field: str, n: int) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError(f"Line {n}: {field} must be a string, got {type(value).__name__}")
+
+
+def _tags(value, n: int = 0) -> Optional[str]:
+    if isinstance(value, list):
+        return ",".join(_text(v, "tags", n) or "" for v in value) or None
+    return _text(value, "tags", n) or None
@@ -0,0 +1,93 @@
+# app/utils/reranker.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from langchain_core.documents import Document
+from sentence_transformers import CrossEncoder
+
+
+class CrossEncoderReranker:
+    """
+    Optional second retrieval stage: rescore cheap top-N candidates with a small
+    cross-encoder and keep the best top-k.
+
+    - Pairs are scored in CPU batches; the time budget is checked between
+      batches and, if exceeded, the original (vector) order is returned.
+    - (query, chunk) scores are kept in an LRU cache, so repeated questions
+      only score chunks they have not seen.
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", batch_size: int = 16,
+                 budget_ms: float = 150.0, cache_size: int = 20000):
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, device="cpu")
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.fallbacks = 0
+        self.cache_hits = 0
+        self.pairs_scored = 0
+
+    @staticmethod
+    def _key(query: str, text: str) -> str:
+        return hashlib.sha1(f"{query}\0{text}".encode("utf-8")).hexdigest()
+
+    def rerank(self, query: str, docs: List[Document], top_k: int = 4) -> List[Document]:
+        """Return the top_k docs by cross-encoder score, or docs[:top_k] if over budget."""
+        if len(docs) <= 1:
+            return docs[:top_k]
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        self.calls += 1
+
+        keys = [self._key(query, d.page_content) for d in docs]
+        scores: Dict[int, float] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[i] = self._cache[key]
+        self.cache_hits += len(scores)
+
+        todo = [i for i in range(len(docs)) if i not in scores]
+        for start in range(0, len(todo), self.batch_size):
+            if time.perf_counter() >= deadline:
+                self.fallbacks += 1
+                return docs[:top_k]
+            part = todo[start:start + self.batch_size]
+            batch_scores = self.model.predict([(query, docs[i].page_content) for i in part],
+                                              batch_size=self.batch_size)
+            self.pairs_scored += len(part)
+            with self._lock:
+                for i, score in zip(part, batch_scores):
+                    scores[i] = float(score)
+                    self._cache[keys[i]] = float(score)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        if time.perf_counter() > deadline:
+            # Scores are cached for next time, but this request keeps vector order
+            self.fallbacks += 1
+            return docs[:top_k]
+
+        order = sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)
+        return [docs[i] for i in order[:top_k]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns call, fallback and cache counters."""
+        return {
+            "model": self.model_name,
+            "budget_ms": self.budget_ms,
+            "calls": self.calls,
+            "fallbacks": self.fallbacks,
+            "cache_hits": self.cache_hits,
+            "pairs_scored": self.pairs_scored,
+            "cache_entries": len(self._cache),
+        }
@@ -0,0 +1,134 @@
+# app/utils/semantic_cache.py
+import threading
+import time
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Answer cache keyed by question embedding instead of the exact question string.
+
+    - Query vectors live in one preallocated float32 matrix, so a lookup is a
+      single matrix-vector product over all cached entries.
+    - A hit is the most similar cached question with cosine >= threshold
+      (vectors are expected to be L2-normalized).
+    - Entries expire after `ttl` seconds; the least recently used entry is
+      evicted when either `maxsize` entries or `max_bytes` is exceeded.
+    - `maxsize <= 0` disables the cache (`put` stores nothing).
+    """
+
+    def __init__(self, dim: int, threshold: float = 0.92, maxsize: int = 1000,
+                 ttl: float = 3600, max_bytes: int = 16 * 1024 * 1024):
+        self.dim = dim
+        self.threshold = threshold
+        self.maxsize = maxsize = max(0, maxsize)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._vecs = np.zeros((maxsize, dim), dtype=np.float32)
+        self._valid = np.zeros(maxsize, dtype=bool)
+        self._expires = np.zeros(maxsize, dtype=np.float64)
+        self._last_used = np.zeros(maxsize, dtype=np.float64)
+        # slot -> (question, answer, nbytes)
+        self._entries: Dict[int, tuple] = {}
+        self._by_question: Dict[str, int] = {}
+        self._free: List[int] = list(range(maxsize - 1, -1, -1))
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    # --------------------------------------------
+    # internal helpers (caller holds the lock)
+    # --------------------------------------------
+    def _remove(self, slot: int) -> None:
+        question, _, nbytes = self._entries.pop(slot)
+        self._by_question.pop(question, None)
+        self._valid[slot] = False
+        self._bytes -= nbytes
+        self._free.append(slot)
+
+    def _expire(self, now: float) -> None:
+        for slot in np.flatnonzero(self._valid & (self._expires <= now)):
+            self._remove(int(slot))
+
+    def _evict_lru(self) -> None:
+        used = np.where(self._valid, self._last_used, np.inf)
+        self._remove(int(np.argmin(used)))
+        self.evictions += 1
+
+    # --------------------------------------------
+    # public API
+    # --------------------------------------------
+    def get(self, question: str, vec: np.ndarray) -> Optional[str]:
+        """Return a cached answer for an identical or semantically close question."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            slot = self._by_question.get(question)
+            if slot is None and self._entries:
+                sims = self._vecs @ np.asarray(vec, dtype=np.float32)
+                sims[~self._valid] = -np.inf
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    slot = best
+
+            if slot is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._last_used[slot] = now
+            return self._entries[slot][1]
+
+    def put(self, question: str, vec: np.ndarray, answer: str) -> None:
+        """Insert or refresh an answer, evicting LRU entries to respect the bounds."""
+        now = time.monotonic()
+        nbytes = self._vecs.itemsize * self.dim + len(question.encode()) + len(answer.encode())
+        if self.maxsize <= 0 or nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            self._expire(now)
+            if question in self._by_question:
+                self._remove(self._by_question[question])
+            while self._entries and (not self._free or self._bytes + nbytes > self.max_bytes):
+                self._evict_lru()
+
+            slot = self._free.pop()
+            self._vecs[slot] = vec
+            self._valid[slot] = True
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._entries[slot] = (question, answer, nbytes)
+            self._by_question[question] = slot
+            self._bytes += nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            for slot in list(self._entries):
+                self._remove(slot)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "threshold": self.threshold,
+                "ttl": self.ttl,
+            }
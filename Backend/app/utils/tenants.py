@@ -0,0 +1,206 @@
+# app/utils/tenants.py
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Chatbot ids become directory names, so keep them to a safe alphabet
+_BOT_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class Tenant:
+    """Everything one chatbot owns: its raw files, document index, KB, manifest and answer cache."""
+
+    def __init__(self, chatbot_id: Optional[str], raw_dir: str, document_db, knowledge_db, manifest, cache):
+        self.chatbot_id = chatbot_id
+        self.raw_dir = raw_dir
+        self.document_db = document_db
+        self.knowledge_db = knowledge_db
+        self.manifest = manifest
+        self.cache = cache
+        # requests/jobs currently using this tenant; only idle tenants are evicted
+        self.in_use = 0
+        # set once close() has finished (successfully or not)
+        self.closed = threading.Event()
+        self._close_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Flush and release every store; the tenant must not be used afterwards. Idempotent."""
+        with self._close_lock:
+            if self.closed.is_set():
+                return
+            try:
+                self.document_db.close()
+                self.knowledge_db.close()
+                self.manifest.close()
+                self.cache.clear()
+            finally:
+                self.closed.set()
+
+
+class TenantRegistry:
+    """
+    Per-chatbot partitions of the backend, opened lazily.
+
+    - No chatbot id selects the default tenant (the original ./data layout),
+      which is opened at startup and never evicted.
+    - Chatbot `<id>` lives in `<bots_dir>/<id>/` with the same layout, so a
+      query only searches that bot's index and KB.
+    - At most `max_loaded` bots stay open; opening another one closes the
+      least recently used bot that no request or job is using.
+    - An evicted bot is reopened only after its close has finished, so the
+      new instance never shares stores (e.g. a Chroma client) that are
+      being shut down.
+    """
+
+    def __init__(self, open_tenant: Callable[[Optional[str]], Tenant], bots_dir: str = "./data/bots",
+                 max_loaded: int = 16):
+        self.open_tenant = open_tenant
+        self.bots_dir = bots_dir
+        self.max_loaded = max_loaded
+
+        self._lock = threading.Lock()
+        self._loaded: "OrderedDict[str, Tenant]" = OrderedDict()
+        self._opening: Dict[str, threading.Lock] = {}
+        # evicted tenants whose close() may not have finished yet
+        self._closing: Dict[str, Tenant] = {}
+        self.loads = 0
+        self.evictions = 0
+
+        self.default = open_tenant(None)
+
+    @staticmethod
+    def normalize_id(chatbot_id: Any) -> Optional[str]:
+        """Canonical string id, None for the default tenant; raises ValueError if unusable."""
+        if chatbot_id is None or chatbot_id == "":
+            return None
+        chatbot_id = str(chatbot_id)
+        if not _BOT_ID_RE.match(chatbot_id):
+            raise ValueError(f"Invalid chatbot id: {chatbot_id!r}")
+        return chatbot_id
+
+    def id_for_path(self, path: str) -> Optional[str]:
+        """Chatbot id owning a raw file path (None for files of the default tenant)."""
+        rel = os.path.relpath(os.path.normpath(path), os.path.normpath(self.bots_dir))
+        parts = rel.split(os.sep)
+        if parts[0] == ".." or len(parts) < 2:
+            return None
+        return parts[0]
+
+    def try_acquire(self, chatbot_id: Any) -> Optional[Tenant]:
+        """Like `acquire`, but only for a tenant that is already open; returns None instead of opening it."""
+        key = self.normalize_id(chatbot_id)
+        with self._lock:
+            if key is None:
+                self.default.in_use += 1
+                return self.default
+            return self._take(key)
+
+    def acquire(self, chatbot_id: Any) -> Tenant:
+        """Return the (possibly newly opened) tenant and mark it in use; pair with `release`."""
+        key = self.normalize_id(chatbot_id)
+        if key is None:
+            with self._lock:
+                self.default.in_use += 1
+            return self.default
+
+        with self._lock:
+            tenant = self._take(key)
+            if tenant is not None:
+                return tenant
+            opening = self._opening.setdefault(key, threading.Lock())
+
+        # Open outside the registry lock so other bots are not blocked meanwhile
+        with opening:
+            with self._lock:
+                tenant = self._take(key)
+                if tenant is not None:
+                    return tenant
+                closing = self._closing.get(key)
+            if closing is not None:
+                closing.closed.wait()
+            tenant = self.open_tenant(key)
+            with self._lock:
+                self._opening.pop(key, None)
+                self._loaded[key] = tenant
+                tenant.in_use += 1
+                self.loads += 1
+                victims = self._pick_victims()
+        self.close_evicted(victims)
+        return tenant
+
+    def _take(self, key: str) -> Optional[Tenant]:
+        tenant = self._loaded.get(key)
+        if tenant is not None:
+            self._loaded.move_to_end(key)
+            tenant.in_use += 1
+        return tenant
+
+    def _pick_victims(self):
+        victims = []
+        for key in list(self._loaded):
+            if len(self._loaded) <= self.max_loaded:
+                break
+            if self._loaded[key].in_use == 0:
+                victim = self._loaded.pop(key)
+                self._closing[key] = victim
+                victims.append(victim)
+                self.evictions += 1
+        return victims
+
+    def release(self, tenant: Tenant, close_victims: bool = True) -> List[Tenant]:
+        """
+        Mark the tenant idle. Tenants evicted as a result are closed here, or
+        returned for the caller to close when `close_victims` is False.
+        """
+        with self._lock:
+            tenant.in_use -= 1
+            victims = self._pick_victims()
+        if not close_victims:
+            return victims
+        self.close_evicted(victims)
+        return []
+
+    def close_evicted(self, victims: List[Tenant]) -> None:
+        for victim in victims:
+            print(f"Closing idle chatbot {victim.chatbot_id}")
+            try:
+                victim.close()
+            finally:
+                with self._lock:
+                    if self._closing.get(victim.chatbot_id) is victim:
+                        del self._closing[victim.chatbot_id]
+
+    @contextmanager
+    def use(self, chatbot_id: Any) -> Iterator[Tenant]:
+        tenant = self.acquire(chatbot_id)
+        try:
+            yield tenant
+        finally:
+            self.release(tenant)
+
+    def close_all(self) -> None:
+        """Close every idle tenant (at shutdown); tenants still in use are left open."""
+        with self._lock:
+            # evicted tenants whose close was queued but may never have run
+            tenants = [self.default, *self._loaded.values(), *self._closing.values()]
+            self._closing.clear()
+            busy = [t for t in tenants if t.in_use > 0]
+            for key in [k for k, t in self._loaded.items() if t.in_use == 0]:
+                del self._loaded[key]
+        for tenant in tenants:
+            if tenant in busy:
+                print(f"Leaving chatbot {tenant.chatbot_id} open: still in use")
+            else:
+                tenant.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded": list(self._loaded),
+                "max_loaded": self.max_loaded,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
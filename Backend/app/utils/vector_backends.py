@@ -0,0 +1,346 @@
+# app/utils/vector_backends.py
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+class VectorBackend:
+    """
+    Storage/search interface behind ChromaDBManager.
+
+    Vectors passed in are L2-normalized float32 embeddings; scores returned by
+    `search` are cosine similarities (higher is better).
+    """
+
+    name = "base"
+
+    def add(self, ids: List[str], vectors: np.ndarray, texts: List[str], metadatas: List[Dict]) -> None:
+        """Insert or overwrite chunks by id."""
+        raise NotImplementedError
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[Document, float]]:
+        raise NotImplementedError
+
+    def delete_ids(self, ids: List[str]) -> None:
+        raise NotImplementedError
+
+    def delete_by_source(self, source: str) -> int:
+        """Delete every chunk whose metadata source matches; returns the number removed."""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def get_all(self) -> Tuple[List[str], List[str], List[Dict]]:
+        """Return (ids, texts, metadatas) of every stored chunk."""
+        raise NotImplementedError
+
+    def persist(self) -> None:
+        """Flush pending changes to disk (no-op for stores that write through)."""
+
+    def close(self) -> None:
+        """Persist and release clients/file handles; the backend is unusable afterwards."""
+        self.persist()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "count": self.count()}
+
+
+class ChromaBackend(VectorBackend):
+    """The original LangChain Chroma collection."""
+
+    name = "chroma"
+
+    def __init__(self, persist_directory: str, collection_name: str, embedding_function):
+        from langchain_community.vectorstores import Chroma
+
+        self.vectordb = Chroma(
+            persist_directory=persist_directory,
+            embedding_function=embedding_function,
+            collection_name=collection_name
+        )
+
+    def add(self, ids, vectors, texts, metadatas):
+        self.vectordb._collection.upsert(
+            ids=ids,
+            embeddings=np.asarray(vectors, dtype=np.float32).tolist(),
+            documents=texts,
+            metadatas=metadatas,
+        )
+
+    def search(self, vector, k):
+        # Chroma's default space is L2; for unit vectors cos = 1 - d^2 / 2
+        results = self.vectordb.similarity_search_by_vector_with_relevance_scores(
+            np.asarray(vector, dtype=np.float32).tolist(), k=k
+        )
+        return [(doc, 1.0 - float(dist) / 2.0) for doc, dist in results]
+
+    def delete_ids(self, ids):
+        if ids:
+            self.vectordb.delete(ids=ids)
+
+    def delete_by_source(self, source):
+        if not self.vectordb._collection.count():
+            return 0
+        ids = self.vectordb.get(where={"source": source}).get("ids") or []
+        if ids:
+            self.vectordb.delete(ids=ids)
+        return len(ids)
+
+    def count(self):
+        return self.vectordb._collection.count()
+
+    def close(self):
+        client = getattr(self.vectordb, "_client", None)
+        self.vectordb = None
+        # chromadb keeps one shared System per persist path for the whole process;
+        # drop ours so a closed bot does not keep its client and files open
+        try:
+            try:
+                from chromadb.api.shared_system_client import SharedSystemClient
+            except ImportError:  # chromadb < 0.5
+                from chromadb.api.client import SharedSystemClient
+            system = SharedSystemClient._identifer_to_system.pop(client._identifier, None)
+        except (ImportError, AttributeError):
+            return
+        if system is not None:
+            system.stop()
+
+    def get_all(self):
+        data = self.vectordb.get(include=["documents", "metadatas"])
+        return data["ids"], data["documents"], data["metadatas"]
+
+
+class _LocalBackend(VectorBackend):
+    """
+    Shared document store for the in-process backends: parallel id/text/metadata
+    lists persisted as JSON next to the index files.
+    """
+
+    def __init__(self, persist_directory: str, dim: int):
+        self.persist_directory = persist_directory
+        self.dim = dim
+        os.makedirs(self.persist_directory, exist_ok=True)
+        self._docs_path = os.path.join(self.persist_directory, "docs.json")
+
+        self._lock = threading.RLock()
+        self._ids: List[Optional[str]] = []
+        self._texts: List[Optional[str]] = []
+        self._metas: List[Optional[Dict]] = []
+        self._row: Dict[str, int] = {}
+
+        if os.path.exists(self._docs_path):
+            with open(self._docs_path, encoding="utf-8") as fh:
+                data = json.load(fh)
+            self._ids, self._texts, self._metas = data["ids"], data["texts"], data["metadatas"]
+            self._row = {i: r for r, i in enumerate(self._ids) if i is not None}
+
+    def _save_docs(self) -> None:
+        tmp = self._docs_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"ids": self._ids, "texts": self._texts, "metadatas": self._metas}, fh)
+        os.replace(tmp, self._docs_path)
+
+    def _doc(self, row: int) -> Document:
+        return Document(page_content=self._texts[row], metadata=dict(self._metas[row]))
+
+    def delete_by_source(self, source):
+        with self._lock:
+            ids = [i for r, i in enumerate(self._ids) if i is not None and self._metas[r].get("source") == source]
+            self.delete_ids(ids)
+            return len(ids)
+
+    def count(self):
+        return len(self._row)
+
+    def get_all(self):
+        with self._lock:
+            rows = sorted(self._row.values())
+            return [self._ids[r] for r in rows], [self._texts[r] for r in rows], [self._metas[r] for r in rows]
+
+
+class NumpyBackend(_LocalBackend):
+    """
+    Exact top-k over one float32 matrix.
+
+    The matrix is saved as `vectors.npy` and memory-mapped on load, so startup
+    does not read the whole index into RAM. Deleted rows are tombstoned (zeroed)
+    and reused by later inserts.
+    """
+
+    name = "numpy"
+
+    def __init__(self, persist_directory: str, dim: int):
+        super().__init__(persist_directory, dim)
+        self._vec_path = os.path.join(self.persist_directory, "vectors.npy")
+        if os.path.exists(self._vec_path):
+            self._vecs = np.load(self._vec_path, mmap_mode="r")
+        else:
+            self._vecs = np.zeros((0, dim), dtype=np.float32)
+        self._free = [r for r, i in enumerate(self._ids) if i is None]
+        self._dirty = False
+
+    def _writable(self, rows_needed: int) -> None:
+        """Copy the mmap into RAM on first write and grow capacity by doubling."""
+        n = len(self._ids)
+        cap = len(self._vecs)
+        if isinstance(self._vecs, np.memmap) or n + rows_needed > cap:
+            new_cap = max(cap, 64)
+            while n + rows_needed > new_cap:
+                new_cap *= 2
+            grown = np.zeros((new_cap, self.dim), dtype=np.float32)
+            grown[:n] = self._vecs[:n]
+            self._vecs = grown
+
+    def add(self, ids, vectors, texts, metadatas):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._writable(len(ids))
+            for i, vec, text, meta in zip(ids, vectors, texts, metadatas):
+                row = self._row.get(i)
+                if row is None:
+                    row = self._free.pop() if self._free else len(self._ids)
+                    if row == len(self._ids):
+                        self._ids.append(None)
+                        self._texts.append(None)
+                        self._metas.append(None)
+                self._vecs[row] = vec
+                self._ids[row], self._texts[row], self._metas[row] = i, text, meta
+                self._row[i] = row
+            self._dirty = True
+
+    def search(self, vector, k):
+        with self._lock:
+            n = len(self._ids)
+            if not self._row:
+                return []
+            scores = self._vecs[:n] @ np.asarray(vector, dtype=np.float32)
+            if self._free:
+                scores[self._free] = -np.inf
+            k = min(k, len(self._row))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._doc(int(r)), float(scores[r])) for r in top]
+
+    def delete_ids(self, ids):
+        with self._lock:
+            rows = [self._row.pop(i) for i in ids if i in self._row]
+            if not rows:
+                return
+            self._writable(0)
+            for r in rows:
+                self._vecs[r] = 0.0
+                self._ids[r] = self._texts[r] = self._metas[r] = None
+            self._free.extend(rows)
+            self._dirty = True
+
+    def persist(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp = self._vec_path + ".tmp.npy"
+            np.save(tmp, np.ascontiguousarray(self._vecs[:len(self._ids)]))
+            os.replace(tmp, self._vec_path)
+            self._save_docs()
+            self._dirty = False
+
+    def close(self):
+        self.persist()
+        with self._lock:
+            # release the memory-mapped vectors.npy
+            self._vecs = np.zeros((0, self.dim), dtype=np.float32)
+
+
+class HnswBackend(_LocalBackend):
+    """
+    Approximate top-k with an hnswlib graph (cosine space), persisted as `index.bin`.
+
+    Rows double as hnswlib labels; deletes use mark_deleted and the label is
+    reused by the next insert. Requires the `hnswlib` package.
+    """
+
+    name = "hnsw"
+
+    def __init__(self, persist_directory: str, dim: int, m: int = 16, ef_construction: int = 200, ef_search: int = 64):
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("VECTOR_BACKEND=hnsw requires the hnswlib package (pip install hnswlib)") from e
+
+        super().__init__(persist_directory, dim)
+        self._index_path = os.path.join(self.persist_directory, "index.bin")
+        self.ef_search = ef_search
+        self._index = hnswlib.Index(space="cosine", dim=dim)
+        if os.path.exists(self._index_path):
+            self._index.load_index(self._index_path, max_elements=max(1024, len(self._ids)))
+        else:
+            self._index.init_index(max_elements=1024, ef_construction=ef_construction, M=m)
+        self._index.set_ef(ef_search)
+        self._free = [r for r, i in enumerate(self._ids) if i is None]
+        self._dirty = False
+
+    def add(self, ids, vectors, texts, metadatas):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            labels = []
+            for i, text, meta in zip(ids, texts, metadatas):
+                row = self._row.get(i)
+                if row is None:
+                    row = self._free.pop() if self._free else len(self._ids)
+                    if row == len(self._ids):
+                        self._ids.append(None)
+                        self._texts.append(None)
+                        self._metas.append(None)
+                    else:
+                        self._index.unmark_deleted(row)
+                self._ids[row], self._texts[row], self._metas[row] = i, text, meta
+                self._row[i] = row
+                labels.append(row)
+
+            needed = len(self._ids)
+            if needed > self._index.get_max_elements():
+                self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+            self._index.add_items(vectors, np.asarray(labels, dtype=np.int64))
+            self._dirty = True
+
+    def search(self, vector, k):
+        with self._lock:
+            k = min(k, len(self._row))
+            if not k:
+                return []
+            self._index.set_ef(max(self.ef_search, k))
+            labels, dists = self._index.knn_query(np.asarray(vector, dtype=np.float32), k=k)
+            return [(self._doc(int(r)), 1.0 - float(d)) for r, d in zip(labels[0], dists[0])]
+
+    def delete_ids(self, ids):
+        with self._lock:
+            rows = [self._row.pop(i) for i in ids if i in self._row]
+            for r in rows:
+                self._index.mark_deleted(r)
+                self._ids[r] = self._texts[r] = self._metas[r] = None
+            self._free.extend(rows)
+            if rows:
+                self._dirty = True
+
+    def persist(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._index.save_index(self._index_path)
+            self._save_docs()
+            self._dirty = False
+
+
+def create_backend(kind: str, persist_directory: str, collection_name: str, embedder) -> VectorBackend:
+    """Build the backend selected by name ("chroma", "numpy" or "hnsw")."""
+    if kind == "chroma":
+        return ChromaBackend(persist_directory, collection_name, embedder)
+    if kind == "numpy":
+        return NumpyBackend(persist_directory, embedder.dim)
+    if kind == "hnsw":
+        return HnswBackend(persist_directory, embedder.dim)
+    raise ValueError(f"Unknown vector backend: {kind}")
@@ -0,0 +1,85 @@
+# benchmarks/kb_ann.py
+"""
+Recall and latency of the KB ANN index (KB_ANN=1) against the exact matrix
+scan, at several KB sizes, to pick KB_ANN_MIN_SIZE.
+
+    python benchmarks/kb_ann.py --sizes 1000,10000,100000 --queries 500 --ef 32,64,128
+
+Question embeddings are synthetic clustered unit vectors (dim 384, like
+MiniLM); queries are noisy copies of stored questions, i.e. paraphrases.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.kb_ann import KBAnnIndex  # noqa: E402
+
+
+def make_corpus(n: int, dim: int, rng) -> np.ndarray:
+    centers = rng.standard_normal((max(1, n // 50), dim)).astype(np.float32)
+    vecs = centers[rng.integers(len(centers), size=n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def percentiles(lat):
+    lat = np.array(lat) * 1000
+    return f"p50={np.percentile(lat, 50):.3f}ms  p99={np.percentile(lat, 99):.3f}ms"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--ef", default="32,64,128")
+    ap.add_argument("-k", type=int, default=5)
+    ap.add_argument("--dim", type=int, default=384)
+    args = ap.parse_args()
+
+    for n in [int(x) for x in args.sizes.split(",")]:
+        rng = np.random.default_rng(0)
+        vecs = make_corpus(n, args.dim, rng)
+        ids = list(range(1, n + 1))
+
+        picks = rng.choice(n, size=min(args.queries, n), replace=False)
+        queries = vecs[picks] + 0.3 * rng.standard_normal((len(picks), args.dim)).astype(np.float32) / np.sqrt(args.dim)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        # Exact scan, the same argmax/argpartition as get_top_answers
+        truth, lat = [], []
+        for q in queries:
+            t0 = time.perf_counter()
+            scores = vecs @ q
+            part = np.argpartition(-scores, args.k - 1)[:args.k]
+            top = part[np.argsort(-scores[part])]
+            lat.append(time.perf_counter() - t0)
+            truth.append([ids[i] for i in top])
+        print(f"n={n}  queries={len(queries)}  k={args.k}")
+        print(f"   exact: {percentiles(lat)}")
+
+        index = KBAnnIndex(args.dim)
+        t0 = time.perf_counter()
+        for s in range(0, n, 1000):
+            index.add(ids[s:s + 1000], vecs[s:s + 1000])
+        build = time.perf_counter() - t0
+
+        for ef in [int(x) for x in args.ef.split(",")]:
+            index.ef_search = ef
+            lat, hit1, hitk = [], 0, 0
+            for q, expected in zip(queries, truth):
+                t0 = time.perf_counter()
+                res = index.search(q, args.k)
+                lat.append(time.perf_counter() - t0)
+                got = [i for i, _ in res]
+                hit1 += got[0] == expected[0]
+                hitk += len(set(got) & set(expected))
+            print(f"  ef={ef:>4}: build={build:.2f}s  recall@1={hit1 / len(queries):.4f}  "
+                  f"recall@{args.k}={hitk / (args.k * len(queries)):.4f}  {percentiles(lat)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/kb_exact_lookup.py
+"""
+Exact-hit QPS of the knowledge base question lookup, across its three versions.
+
+    python benchmarks/kb_exact_lookup.py --pairs 20000 --lookups 100000 --threads 8
+
+- "connect per lookup": a fresh connection per query against a table without
+  the question index (the original KnowledgeBaseManager path).
+- "pooled": the same query through SQLitePool on the indexed table, i.e. the
+  connection pool and qa_pairs(question) index.
+- "get_exact_answer": the in-memory normalized-question index used before any
+  embedding on /query. Its lookups vary case, spacing and punctuation to
+  exercise normalization; the SQL rows can only match the verbatim question.
+
+Rows are written with stored embeddings for the current model, so the KB loads
+without encoding anything.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.embeddings import EmbeddingService  # noqa: E402
+from app.utils.kb_manager import KnowledgeBaseManager  # noqa: E402
+from app.utils.sqlite_pool import SQLitePool  # noqa: E402
+
+QUERY = "SELECT answer FROM qa_pairs WHERE question = ?"
+
+
+def question(i: int) -> str:
+    return f"What is the fee for course {i}?"
+
+
+def build_plain_db(path: str, n: int) -> None:
+    """The pre-pool schema: no question index, default journal mode."""
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE qa_pairs(id INTEGER PRIMARY KEY, question TEXT, answer TEXT, tags TEXT)")
+        conn.executemany(
+            "INSERT INTO qa_pairs(question, answer, tags) VALUES(?,?,?)",
+            [(question(i), f"The fee for course {i} is {i * 10} rupees.", "fees") for i in range(n)],
+        )
+        conn.commit()
+
+
+def build_kb_db(path: str, n: int, embedder: EmbeddingService) -> None:
+    rng = np.random.default_rng(0)
+    vecs = rng.standard_normal((n, embedder.dim)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    # Let KnowledgeBaseManager create the schema (and question index), then bulk-write rows directly
+    kb = KnowledgeBaseManager(path, embedder=embedder)
+    tag = kb._emb_tag
+    kb.close()
+    pool = SQLitePool(path, size=1)
+    with pool.connection() as conn:
+        conn.executemany(
+            "INSERT INTO qa_pairs(question, answer, tags, embedding, embedding_model) VALUES(?,?,?,?,?)",
+            [(question(i), f"The fee for course {i} is {i * 10} rupees.", "fees", vecs[i].tobytes(), tag)
+             for i in range(n)],
+        )
+    pool.close()
+
+
+def run(lookup, questions, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as ex:
+        hits = sum(1 for a in ex.map(lookup, questions) if a is not None)
+    elapsed = time.perf_counter() - start
+    assert hits == len(questions), f"{len(questions) - hits} misses"
+    return len(questions) / elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pairs", type=int, default=20000)
+    ap.add_argument("--lookups", type=int, default=100000)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--connect-lookups", type=int, default=20000,
+                    help="lookups for the (slow) connect-per-lookup baseline")
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    ids = [rng.randrange(args.pairs) for _ in range(args.lookups)]
+    variants = ["what is the fee for course {}", "WHAT IS THE FEE FOR COURSE {}?!", "  what is the  fee for course {} ?"]
+    typed = [rng.choice(variants).format(i) for i in ids]
+    stored = [question(i) for i in ids]
+
+    embedder = EmbeddingService()
+    with tempfile.TemporaryDirectory() as tmp:
+        plain_path = os.path.join(tmp, "plain.db")
+        kb_path = os.path.join(tmp, "kb.db")
+        build_plain_db(plain_path, args.pairs)
+        build_kb_db(kb_path, args.pairs, embedder)
+
+        t0 = time.perf_counter()
+        kb = KnowledgeBaseManager(kb_path, embedder=embedder, pool_size=args.threads)
+        print(f"{args.pairs} pairs (KB loaded in {time.perf_counter() - t0:.2f}s), {args.threads} threads")
+
+        def lookup_connect(q):
+            with sqlite3.connect(plain_path) as conn:
+                row = conn.execute(QUERY, (q,)).fetchone()
+            return row[0] if row else None
+
+        pool = SQLitePool(kb_path, size=args.threads)
+
+        def lookup_pooled(q):
+            with pool.connection() as conn:
+                row = conn.execute(QUERY, (q,)).fetchone()
+            return row[0] if row else None
+
+        connect = run(lookup_connect, stored[:args.connect_lookups], args.threads)
+        print(f"  connect per lookup, no index (verbatim):  {connect:12.0f} lookups/s")
+        pooled = run(lookup_pooled, stored, args.threads)
+        print(f"  pooled WAL, indexed (verbatim):           {pooled:12.0f} lookups/s  ({pooled / connect:.1f}x)")
+        mem = run(kb.get_exact_answer, typed, args.threads)
+        print(f"  get_exact_answer (normalized question):   {mem:12.0f} lookups/s  ({mem / connect:.1f}x)")
+        pool.close()
+        kb.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/normalize_text.py
+"""
+Micro-benchmark for loader.normalize_text over the bundled data/raw_docs corpus.
+
+    python benchmarks/normalize_text.py [--repeat 200]
+
+Checks that the current normalizer matches the original regex implementation
+byte for byte, then reports MB/s for both so regressions show up.
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.loader import normalize_text  # noqa: E402
+
+
+def normalize_text_reference(text: str) -> str:
+    """The original four-pass implementation, kept as the correctness oracle."""
+    if not text:
+        return text
+    text = text.replace("\u00AD", "")
+    text = text.replace("\u200B", "")
+    text = re.sub(r'-\n\s*', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def load_corpus(raw_dir: str):
+    texts = []
+    for fname in sorted(os.listdir(raw_dir)):
+        path = os.path.join(raw_dir, fname)
+        if fname.lower().endswith((".md", ".txt")):
+            with open(path, encoding="utf-8", errors="ignore") as fh:
+                texts.append(fh.read())
+    # Synthetic worst case: PDF-style hard wraps and hyphenation
+    texts.append(("exam-\n  ple\u00AD text\u200B with   wrapped\nlines -\n" * 2000))
+    return texts
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--raw-dir", default="./data/raw_docs")
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    texts = load_corpus(args.raw_dir)
+    size_mb = sum(len(t.encode("utf-8")) for t in texts) / 2**20
+    for t in texts:
+        assert normalize_text(t) == normalize_text_reference(t), "normalize_text output changed"
+
+    print(f"{len(texts)} texts, {size_mb:.2f} MiB per pass, {args.repeat} passes")
+    for label, fn in (("reference", normalize_text_reference), ("current", normalize_text)):
+        best = min(timeit.repeat(lambda: [fn(t) for t in texts], number=args.repeat, repeat=3))
+        print(f"{label:>10}: {size_mb * args.repeat / best:8.1f} MiB/s  ({best / args.repeat * 1000:.3f} ms/pass)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/pdf_loader.py
+"""
+Compare the original PyPDFLoader path with the page-streaming PyMuPDF loader.
+
+    python benchmarks/pdf_loader.py path/to/prospectus.pdf [more.pdf ...]
+
+Reports pages/s, chunks produced and peak Python heap (tracemalloc) for each.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.document_loaders import PyPDFLoader  # noqa: E402
+
+from app.utils.loader import iter_pdf_chunks, normalize_text, split_documents, _pdf_page_count  # noqa: E402
+
+
+def pypdf_loader(path):
+    docs = PyPDFLoader(path).load()
+    for d in docs:
+        d.page_content = normalize_text(d.page_content)
+    return split_documents(docs)
+
+
+def streaming_loader(path):
+    # Consume without keeping the chunks, as the batched writer does
+    n = 0
+    for _ in iter_pdf_chunks(path):
+        n += 1
+    return range(n)
+
+
+def run(label, fn, paths, pages):
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = sum(len(fn(p)) for p in paths)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>10}: {pages / elapsed:8.1f} pages/s  {chunks} chunks  "
+          f"{elapsed:.2f}s  peak heap {peak / 2**20:.1f} MiB")
+
+
+def main():
+    paths = sys.argv[1:]
+    if not paths:
+        sys.exit("usage: pdf_loader.py file.pdf [file.pdf ...]")
+    pages = sum(_pdf_page_count(p) for p in paths)
+    print(f"{len(paths)} file(s), {pages} pages")
+    run("pypdf", pypdf_loader, paths, pages)
+    run("pymupdf", streaming_loader, paths, pages)
+
+
+if __name__ == "__main__":
+    main()
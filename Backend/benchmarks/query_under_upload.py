@@ -0,0 +1,102 @@
+# benchmarks/query_under_upload.py
+"""
+Measure /query latency percentiles with and without a concurrent upload.
+
+Run against a live backend (uvicorn app.main:app):
+
+    python benchmarks/query_under_upload.py --file data/raw_docs/big.pdf
+
+/upload only saves the file and returns a job id, so the loaded phase keeps
+querying until that ingestion job has finished (polling /jobs/{job_id}).
+
+Queries default to a KB/cache-backed question so the numbers reflect the
+backend itself rather than the upstream LLM.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+
+async def timed_query(client: httpx.AsyncClient, url: str, question: str) -> float:
+    start = time.perf_counter()
+    async with client.stream("POST", f"{url}/query", json={"question": question}) as resp:
+        async for _ in resp.aiter_lines():
+            break
+    return time.perf_counter() - start
+
+
+async def query_load(client, url, question, n, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            return await timed_query(client, url, question)
+
+    return await asyncio.gather(*[one() for _ in range(n)])
+
+
+async def query_until(client, url, question, concurrency, done: asyncio.Event):
+    """Query from `concurrency` workers until `done` is set; returns all latencies."""
+    samples = []
+
+    async def worker():
+        while not done.is_set():
+            samples.append(await timed_query(client, url, question))
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return samples
+
+
+def report(label, samples):
+    s = sorted(samples)
+    p = lambda q: s[min(len(s) - 1, int(q * len(s)))] * 1000
+    print(f"{label:>16}: n={len(s)}  p50={p(0.50):.1f}ms  p95={p(0.95):.1f}ms  "
+          f"p99={p(0.99):.1f}ms  mean={statistics.mean(s) * 1000:.1f}ms")
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--file", required=True, help="document to upload during the loaded run")
+    ap.add_argument("--question", default="what are the fees")
+    ap.add_argument("-n", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--poll", type=float, default=0.2, help="seconds between /jobs polls")
+    args = ap.parse_args()
+
+    async with httpx.AsyncClient(timeout=300) as client:
+        await timed_query(client, args.url, args.question)  # warm up
+        report("idle", await query_load(client, args.url, args.question, args.n, args.concurrency))
+
+        done = asyncio.Event()
+
+        async def upload_and_ingest():
+            with open(args.file, "rb") as fh:
+                files = {"files": (os.path.basename(args.file), fh.read())}
+            start = time.perf_counter()
+            try:
+                resp = await client.post(f"{args.url}/upload", files=files)
+                resp.raise_for_status()
+                saved = time.perf_counter() - start
+                job_id = resp.json()["job_id"]
+                while True:
+                    job = (await client.get(f"{args.url}/jobs/{job_id}")).json()
+                    if job["status"] in ("done", "failed"):
+                        return saved, time.perf_counter() - start, job
+                    await asyncio.sleep(args.poll)
+            finally:
+                done.set()
+
+        ingest_task = asyncio.create_task(upload_and_ingest())
+        samples = await query_until(client, args.url, args.question, args.concurrency, done)
+        saved, ingested, job = await ingest_task
+        report("during ingest", samples)
+        print(f"upload returned after {saved:.2f}s; job {job['id']} {job['status']} after {ingested:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+# benchmarks/vector_backends.py
+"""
+Compare recall@k and search latency of the vector backends against the exact
+NumPy scan.
+
+    python benchmarks/vector_backends.py --n 100000 --queries 500
+
+Real chunks from data/raw_docs are embedded with MiniLM; the corpus is padded
+to --n with random unit vectors so the scaling behaviour is visible. Queries
+are noisy copies of corpus vectors.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.embeddings import EmbeddingService  # noqa: E402
+from app.utils.loader import load_and_split  # noqa: E402
+from app.utils.vector_backends import create_backend  # noqa: E402
+
+
+def build_corpus(n: int, embedder: EmbeddingService, raw_dir: str):
+    texts, metas = [], []
+    for fname in sorted(os.listdir(raw_dir)):
+        for d in load_and_split(os.path.join(raw_dir, fname)):
+            texts.append(d.page_content)
+            metas.append(d.metadata)
+    vecs = embedder.encode(texts) if texts else np.zeros((0, embedder.dim), dtype=np.float32)
+
+    extra = max(0, n - len(texts))
+    if extra:
+        rng = np.random.default_rng(0)
+        pad = rng.standard_normal((extra, embedder.dim)).astype(np.float32)
+        pad /= np.linalg.norm(pad, axis=1, keepdims=True)
+        vecs = np.vstack([vecs, pad])
+        texts += [f"synthetic {i}" for i in range(extra)]
+        metas += [{"source": "synthetic"} for _ in range(extra)]
+    return vecs, texts, metas
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--queries", type=int, default=300)
+    ap.add_argument("-k", type=int, default=4)
+    ap.add_argument("--backends", default="numpy,hnsw,chroma")
+    ap.add_argument("--raw-dir", default="./data/raw_docs")
+    args = ap.parse_args()
+
+    embedder = EmbeddingService()
+    vecs, texts, metas = build_corpus(args.n, embedder, args.raw_dir)
+    ids = [f"c{i}" for i in range(len(texts))]
+    for chunk_id, meta in zip(ids, metas):
+        meta["bench_id"] = chunk_id
+
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(vecs), size=args.queries, replace=False)
+    queries = vecs[picks] + 0.05 * rng.standard_normal((args.queries, embedder.dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    truth = np.argsort(-(queries @ vecs.T), axis=1)[:, :args.k]
+    truth = [{ids[j] for j in row} for row in truth]
+
+    print(f"corpus={len(vecs)}  queries={args.queries}  k={args.k}")
+    for kind in args.backends.split(","):
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                backend = create_backend(kind, tmp, "bench", embedder)
+            except ImportError as e:
+                print(f"{kind:>8}: skipped ({e})")
+                continue
+
+            start = time.perf_counter()
+            for s in range(0, len(ids), 1000):
+                backend.add(ids[s:s + 1000], vecs[s:s + 1000], texts[s:s + 1000], metas[s:s + 1000])
+            backend.persist()
+            build = time.perf_counter() - start
+
+            lat, hits = [], 0
+            for q, expected in zip(queries, truth):
+                t0 = time.perf_counter()
+                res = backend.search(q, args.k)
+                lat.append(time.perf_counter() - t0)
+                hits += len({d.metadata["bench_id"] for d, _ in res} & expected)
+
+            lat = np.array(lat) * 1000
+            print(f"{kind:>8}: build={build:.2f}s  recall@{args.k}={hits / (args.k * args.queries):.4f}  "
+                  f"p50={np.percentile(lat, 50):.3f}ms  p99={np.percentile(lat, 99):.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# tests/test_job_manager.py
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.job_manager import JobManager  # noqa: E402
+
+
+def wait_finished(jm, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while jm.get(job_id)["status"] not in JobManager.FINISHED and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return jm.get(job_id)
+
+
+def test_jobs_run_every_file(tmp_path):
+    seen = []
+
+    def worker(path, progress):
+        progress(chunks_written=1)
+        seen.append(path)
+
+    jm = JobManager(str(tmp_path / "jobs.db"), worker)
+    job_id = jm.submit(["a.txt", "b.txt"])
+    assert wait_finished(jm, job_id)["status"] == "done"
+    assert seen == ["a.txt", "b.txt"]
+    jm.shutdown()
+
+
+def test_shutdown_leaves_running_job_resumable(tmp_path):
+    db = str(tmp_path / "jobs.db")
+    started, release = threading.Event(), threading.Event()
+
+    def slow_worker(path, progress):
+        started.set()
+        release.wait(5)
+        progress(chunks_written=1)  # next batch: stops here
+
+    jm = JobManager(db, slow_worker)
+    job_id = jm.submit(["a.txt", "b.txt"])
+    assert started.wait(5)
+    stopper = threading.Thread(target=jm.shutdown)
+    stopper.start()
+    assert jm._stopping.wait(5)
+    release.set()
+    stopper.join(5)
+    assert not stopper.is_alive()
+
+    job = jm.get(job_id)
+    assert job["status"] == "running" and job["error"] is None
+
+    done = []
+    jm = JobManager(db, lambda path, progress: done.append(path))
+    assert jm.resume() == 1
+    assert wait_finished(jm, job_id)["status"] == "done"
+    jm.shutdown()
+    assert done == ["a.txt", "b.txt"]
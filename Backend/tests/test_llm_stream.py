@@ -0,0 +1,100 @@
+# tests/test_llm_stream.py
+"""
+Streaming proxy against a local OpenAI-style SSE stub (httpx.MockTransport).
+
+    cd Backend && python -m pytest -q tests
+"""
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.llm_stream import batch_words, iter_llm_deltas, stream_chat  # noqa: E402
+
+URL = "http://llm.test/v1/chat/completions"
+
+
+def sse_body(*deltas, done=True, extra_lines=()):
+    lines = list(extra_lines)
+    for d in deltas:
+        lines.append("data: " + json.dumps({"choices": [{"delta": {"content": d}}]}))
+    if done:
+        lines.append("data: [DONE]")
+        # Anything after the sentinel must be ignored
+        lines.append("data: " + json.dumps({"choices": [{"delta": {"content": "IGNORED"}}]}))
+    return ("\n\n".join(lines) + "\n\n").encode()
+
+
+def stub_client(status=200, body=b""):
+    def handler(request):
+        return httpx.Response(status, content=body, headers={"content-type": "text/event-stream"})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def run_chat(client, on_answer=None):
+    async def collect():
+        async with client:
+            return [e async for e in stream_chat(client, URL, {}, {"stream": True}, on_answer=on_answer)]
+    return [parse_event(e) for e in asyncio.run(collect())]
+
+
+def parse_event(raw):
+    event, data = raw.strip().split("\n")
+    return event[len("event: "):], json.loads(data[len("data: "):])["text"]
+
+
+def test_deltas_forwarded_until_done_and_malformed_lines_skipped():
+    body = sse_body("Hel", "lo", " wor", "ld", extra_lines=[
+        ": keep-alive comment",
+        "event: ping",
+        "data: {not json",
+        "data: [1, 2]",
+        'data: {"choices": []}',
+        'data: {"choices": [{"delta": {}}]}',
+    ])
+
+    async def collect():
+        async with stub_client(body=body) as client:
+            async with client.stream("POST", URL) as response:
+                return [d async for d in iter_llm_deltas(response)]
+
+    assert asyncio.run(collect()) == ["Hel", "lo", " wor", "ld"]
+
+
+def test_batch_words_emits_whole_words_and_flushes_tail():
+    async def deltas():
+        for d in ["Hel", "lo wo", "rld\nne", "xt"]:
+            yield d
+
+    async def collect():
+        return [p async for p in batch_words(deltas())]
+
+    assert asyncio.run(collect()) == ["Hello ", "world\n", "next"]
+
+
+def test_stream_chat_tokens_then_final_answer():
+    answers = []
+    events = run_chat(stub_client(body=sse_body("The fee ", "is 100", " rupees", ".")), on_answer=answers.append)
+
+    tokens = [text for event, text in events if event == "token"]
+    assert "".join(tokens) == "The fee is 100 rupees."
+    assert all(t.endswith(" ") for t in tokens[:-1])
+    assert events[-1] == ("final_response", "The fee is 100 rupees.")
+    assert answers == ["The fee is 100 rupees."]
+
+
+def test_stream_chat_non_200_reports_error_and_skips_callback():
+    answers = []
+    events = run_chat(stub_client(status=503, body=b"overloaded"), on_answer=answers.append)
+
+    assert events == [("final_response", "HF Error 503: overloaded")]
+    assert answers == []
+
+
+def test_stream_chat_empty_answer():
+    events = run_chat(stub_client(body=sse_body()))
+    assert events == [("final_response", "Unexpected HF response: empty answer")]
@@ -0,0 +1,27 @@
+# tests/test_qa_import.py
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.qa_import import iter_qa_jsonl  # noqa: E402
+
+
+def test_jsonl_coerces_numbers_and_joins_tags():
+    fh = io.StringIO('{"question": 42, "answer": "x", "tags": ["a", 2]}\n\n{"question": "q", "answer": "a"}\n')
+    assert list(iter_qa_jsonl(fh)) == [("42", "x", "a,2"), ("q", "a", None)]
+
+
+@pytest.mark.parametrize("line", [
+    "[1, 2]",
+    '"just a string"',
+    '{"question": {"text": "q"}, "answer": "a"}',
+    '{"question": "q", "answer": ["a"]}',
+    '{"question": "q", "answer": "a", "tags": {"t": 1}}',
+])
+def test_jsonl_rejects_wrong_shapes_with_value_error(line):
+    with pytest.raises(ValueError, match="[Ll]ine 2"):
+        list(iter_qa_jsonl(io.StringIO('{"question": "ok", "answer": "ok"}\n' + line + "\n")))
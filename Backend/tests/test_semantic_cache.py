@@ -0,0 +1,42 @@
+# tests/test_semantic_cache.py
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.semantic_cache import SemanticCache  # noqa: E402
+
+
+def unit(seed, dim=8):
+    v = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_hit_on_same_and_close_question():
+    cache = SemanticCache(dim=8, threshold=0.9, maxsize=4)
+    v = unit(0)
+    cache.put("what is the fee", v, "100")
+    assert cache.get("what is the fee", v) == "100"
+    assert cache.get("fee?", v + 0.01) == "100"
+    assert cache.get("where is campus", unit(1)) is None
+
+
+def test_maxsize_zero_disables_cache():
+    for maxsize in (0, -1):
+        cache = SemanticCache(dim=8, maxsize=maxsize)
+        cache.put("q", unit(0), "a")
+        assert len(cache) == 0
+        assert cache.get("q", unit(0)) is None
+
+
+def test_lru_eviction_at_maxsize():
+    cache = SemanticCache(dim=8, maxsize=2)
+    cache.put("a", unit(0), "A")
+    cache.put("b", unit(1), "B")
+    cache.get("a", unit(0))
+    cache.put("c", unit(2), "C")
+    assert cache.get("b", unit(1)) is None
+    assert cache.get("a", unit(0)) == "A"
+    assert cache.get_stats()["evictions"] == 1
@@ -0,0 +1,85 @@
+# tests/test_tenants.py
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.tenants import Tenant, TenantRegistry  # noqa: E402
+
+
+class Store:
+    def __init__(self, log, name):
+        self.log, self.name = log, name
+
+    def close(self):
+        self.log.append(("close", self.name))
+
+    def clear(self):
+        pass
+
+
+def registry(max_loaded=2):
+    log = []
+
+    def open_tenant(key):
+        log.append(("open", key))
+        s = Store(log, key)
+        return Tenant(key, f"/bots/{key}", s, Store([], key), Store([], key), Store([], key))
+
+    return TenantRegistry(open_tenant, bots_dir="/bots", max_loaded=max_loaded), log
+
+
+def test_lru_eviction_skips_tenants_in_use():
+    reg, log = registry(max_loaded=2)
+    a = reg.acquire("a")
+    reg.release(reg.acquire("b"))
+    reg.acquire("c")  # b is the least recently used idle bot
+    assert reg.get_stats()["loaded"] == ["a", "c"]
+    assert ("close", "b") in log and ("close", "a") not in log
+
+    reg.acquire("d")  # a and c are in use: over the limit until one is released
+    assert reg.get_stats()["loaded"] == ["a", "c", "d"]
+    reg.release(a)
+    assert reg.get_stats()["loaded"] == ["c", "d"]
+    assert reg.get_stats()["evictions"] == 2
+
+
+def test_try_acquire_only_returns_open_tenants():
+    reg, _ = registry()
+    assert reg.try_acquire("a") is None
+    assert reg.try_acquire(None) is reg.default
+    a = reg.acquire("a")
+    assert reg.try_acquire("a") is a and a.in_use == 2
+    with pytest.raises(ValueError):
+        reg.try_acquire("../etc")
+
+
+def test_reopen_waits_for_pending_close():
+    reg, log = registry(max_loaded=1)
+    a = reg.acquire("a")
+    reg.acquire("b")
+    victims = reg.release(a, close_victims=False)
+    assert victims == [a] and not a.closed.is_set()
+
+    reopened = []
+    t = threading.Thread(target=lambda: reopened.append(reg.acquire("a")))
+    t.start()
+    t.join(0.2)
+    assert t.is_alive() and log.count(("open", "a")) == 1
+
+    reg.close_evicted(victims)
+    t.join(5)
+    assert reopened and reopened[0] is not a
+    assert log[-2:] == [("close", "a"), ("open", "a")]
+
+
+def test_close_all_leaves_busy_tenants_open():
+    reg, log = registry()
+    reg.acquire("a")
+    reg.release(reg.acquire("b"))
+    reg.close_all()
+    assert ("close", "b") in log and ("close", "a") not in log
+    assert reg.get_stats()["loaded"] == ["a"]
@@ -365,12 +365,45 @@ def profile():
 
 # --- CHAT & KNOWLEDGE BASE ROUTES ---
 
+def bot_owner_ids(include_inviter=True):
+    """Users whose bots the current user may use: themselves and, for students, their inviter."""
+    owner_ids = [current_user.id]
+    if include_inviter and current_user.role == 'student' and current_user.inviter is not None:
+        owner_ids.append(current_user.inviter.id)
+    return owner_ids
+
+def get_user_bots():
+    return Chatbot.query.filter(Chatbot.user_id.in_(bot_owner_ids())).order_by(Chatbot.id).all()
+
+def get_owned_bot(bot_id, include_inviter=True):
+    """The chatbot with this id if the current user may use it, or None (never another user's bot)."""
+    if bot_id is None:
+        return None
+    return Chatbot.query.filter(Chatbot.id == bot_id,
+                                Chatbot.user_id.in_(bot_owner_ids(include_inviter))).first()
+
+def select_bot():
+    """
+    Bot picked by ?bot_id= (None if the user may not use it), else the user's
+    first bot. Returns (bot, bots); bot is None for users without any bot.
+    """
+    bots = get_user_bots()
+    bot_id = request.args.get("bot_id", type=int)
+    if bot_id is not None:
+        return next((b for b in bots if b.id == bot_id), None), bots
+    return (bots[0] if bots else None), bots
+
 @app.route("/chat")
 @login_required
 def chat():
     # This just renders the chat page. The old PDF sidebar logic is removed.
-    # We will later add logic to select *which* bot to chat with.
-    return render_template("index.html", title='AI Chat Assistant')
+    # 👈 /chat?bot_id=<id> chats with that bot's knowledge; without an id, the user's first bot
+    # (students use their inviter's bots; users without any bot get the default knowledge)
+    bot, _ = select_bot()
+    if bot is None and request.args.get("bot_id"):
+        flash('That AI Assistant does not exist or is not yours.', 'warning')
+        return redirect(url_for('chat'))
+    return render_template("index.html", title='AI Chat Assistant', chatbot_id=bot.id if bot else None)
 
 # 👈 NEW: /knowledge/upload route
 @app.route("/knowledge/upload", methods=["GET"])
@@ -389,7 +422,7 @@ def upload():
 @login_required
 def preview_pdf():
     pdf_file = request.files.get("pdf")
-    chatbot_id = request.form.get("chatbot_id") # 👈 Get selected bot ID
+    chatbot_id = request.form.get("chatbot_id", type=int) # 👈 Get selected bot ID
     user_bots = Chatbot.query.filter_by(user_id=current_user.id).all()
 
     if not pdf_file:
@@ -398,12 +431,15 @@ def preview_pdf():
     if not chatbot_id:
         flash("You must select an AI Assistant to link this knowledge to.", 'danger')
         return render_template("upload.html", title='Upload Knowledge', bots=user_bots, error="You must select an assistant.")
+    if get_owned_bot(chatbot_id, include_inviter=False) is None:
+        flash("That AI Assistant does not exist or is not yours.", 'danger')
+        return render_template("upload.html", title='Upload Knowledge', bots=user_bots, error="Unknown assistant.")
 
     # Send file to backend FastAPI /upload endpoint
     backend_url = "http://127.0.0.1:8000/upload"
     files = {"files": (pdf_file.filename, pdf_file.stream, pdf_file.mimetype)}
     try:
-        resp = requests.post(backend_url, files=files, timeout=60)
+        resp = requests.post(backend_url, files=files, data={"chatbot_id": chatbot_id}, timeout=60)
         if resp.status_code == 200:
             result = resp.json()
             flash(f"Upload successful: {result.get('message', '')}", 'success')
@@ -413,13 +449,16 @@ def preview_pdf():
         flash(f"Error uploading to backend: {str(e)}", 'danger')
 
     # No local save, no preview image
-    return render_template("upload.html", title='Upload Knowledge', bots=user_bots, selected_bot_id=int(chatbot_id))
+    return render_template("upload.html", title='Upload Knowledge', bots=user_bots, selected_bot_id=chatbot_id)
 
 # --- UPDATED: /upload/submit route ---
 @app.route("/upload/submit", methods=["POST"])
 @login_required
 def upload_submit():
     # 👈 Link PDF to the selected chatbot
+    if get_owned_bot(request.form.get("chatbot_id", type=int), include_inviter=False) is None:
+        flash("That AI Assistant does not exist or is not yours.", 'danger')
+        return redirect(url_for('upload'))
     new_pdf = UploadedPDF(
         filename=request.form["filename"],
         filepath=request.form["filepath"],
@@ -465,20 +504,29 @@ def speak():
 BASE_FASTAPI_URL = "http://127.0.0.1:8000" # Example: "http://127.0.0.1:8000"
 
 @app.route("/stream_response", methods=["POST"])
+@login_required
 def stream_response():
     question = request.json.get("question")
+    chatbot_id = request.json.get("chatbot_id") # 👈 Which bot's knowledge to search
     if not question:
         return jsonify({"error": "Missing question"}), 400
+    if chatbot_id is not None:
+        try:
+            bot = get_owned_bot(int(chatbot_id))
+        except (TypeError, ValueError):
+            bot = None
+        if bot is None:
+            return jsonify({"error": "Unknown chatbot"}), 404
+        chatbot_id = bot.id
 
     import json as json_lib
     
     @stream_with_context
     def generate():
         try:
-            # You might want to pass more context here, like the current chatbot_id
             with requests.post(
                 BASE_FASTAPI_URL + "/query",
-                json={"question": question}, stream=True, timeout=120 # Increased timeout
+                json={"question": question, "chatbot_id": chatbot_id}, stream=True, timeout=120 # Increased timeout
             ) as response:
                 if response.status_code != 200:
                     yield f"data: {json_lib.dumps({'text': f'[ERROR]: Upstream returned {response.status_code}. Check the AI service.'})}\n\n"
@@ -517,12 +565,22 @@ def favicon():
 @app.route("/resources")
 @login_required
 def resources():
-    return render_template("resources.html", title="Resources/Documents")
+    # 👈 Documents are managed per bot (?bot_id=<id>, default: the user's first bot)
+    bot, bots = select_bot()
+    if bot is None and request.args.get("bot_id"):
+        flash('That AI Assistant does not exist or is not yours.', 'warning')
+        return redirect(url_for('resources'))
+    return render_template("resources.html", title="Resources/Documents", bots=bots, chatbot_id=bot.id if bot else None)
 
 @app.route("/knowledge_base")
 @login_required
 def knowledge_base():
-    return render_template("knowledge_base.html", title="Knowledge Base")
+    # 👈 Q&A pairs are managed per bot (?bot_id=<id>, default: the user's first bot)
+    bot, bots = select_bot()
+    if bot is None and request.args.get("bot_id"):
+        flash('That AI Assistant does not exist or is not yours.', 'warning')
+        return redirect(url_for('knowledge_base'))
+    return render_template("knowledge_base.html", title="Knowledge Base", bots=bots, chatbot_id=bot.id if bot else None)
 
 @app.route("/admin_tools")
 @login_required
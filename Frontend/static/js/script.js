@@ -6,6 +6,8 @@ const chatForm = document.getElementById("chat-form");
 const chatInput = document.getElementById("chat-input");
 const recordButton = document.getElementById('recordButton');
 const loader = document.getElementById('loader');
+// Bot selected via /chat?bot_id=<id> (empty = default knowledge)
+const chatbotId = document.querySelector('.chat-layout')?.dataset.chatbotId || null;
 
 // Speech & Recording variables
 let mediaRecorder;
@@ -77,7 +79,7 @@ function handleStream(prompt) {
     fetchEventSource("/stream_response", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ question: prompt }),
+        body: JSON.stringify({ question: prompt, chatbot_id: chatbotId }),
         onopen: (res) => { if (!res.ok) throw new Error("Stream connection failed"); },
         onmessage(ev) {
             if (replyTextElement === null) {